@@ -1,7 +1,7 @@
 """
 Hikrobot GigE + YOLO11 실시간 결함(hole, scratch, burr) 검출 예제
 - Windows + MVS SDK + Python
-- YOLO11 세그멘테이션 모델 사용 (box만 시각화)
+- YOLO11 세그멘테이션 모델 사용 (마스크로 결함 면적/길이/폭(mm) 측정, box로 시각화)
 
 필요:
     pip install ultralytics opencv-python numpy
@@ -13,11 +13,18 @@ import time
 import ctypes
 from ctypes import byref, memset, c_ubyte
 from pathlib import Path
+from typing import Optional
 
 import cv2
 import numpy as np
 from ultralytics import YOLO
 
+from defect_postprocess import measure_defects
+from frame_gate import FrameGate
+from part_tracker import PartTracker
+from pixel_convert import buffer_to_bgr
+from preview_stream import PreviewStream
+
 # ---------------------------
 # 1. MVS SDK 파이썬 모듈 경로 설정
 # ---------------------------
@@ -137,6 +144,14 @@ def close_hik_camera(cam):
 # 3. 한 프레임 받아서 OpenCV BGR 이미지로 변환
 # ---------------------------
 
+# SDK 픽셀 타입 → pixel_convert 포맷 이름
+_PIXEL_FORMATS = {
+    PixelType_Gvsp_Mono8: "Mono8",
+    PixelType_Gvsp_RGB8_Packed: "RGB8",
+    PixelType_Gvsp_BayerRG8: "BayerRG8",
+}
+
+
 def grab_frame_bgr(cam, data_buf, payload_size, timeout_ms: int = 1000):
     frame_info = MV_FRAME_OUT_INFO_EX()
     memset(byref(frame_info), 0, ctypes.sizeof(MV_FRAME_OUT_INFO_EX))
@@ -155,35 +170,12 @@ def grab_frame_bgr(cam, data_buf, payload_size, timeout_ms: int = 1000):
     height = frame_info.nHeight
     pixel_type = frame_info.enPixelType
 
-    # --- 1) Mono8 → Gray → BGR ---------------------------------
-    if pixel_type == PixelType_Gvsp_Mono8:
-        img_gray = np.frombuffer(data_buf, dtype=np.uint8,
-                                 count=width * height)
-        img_gray = img_gray.reshape(height, width)
-        img_bgr = cv2.cvtColor(img_gray, cv2.COLOR_GRAY2BGR)
-
-    # --- 2) RGB8 Packed → BGR -----------------------------------
-    elif pixel_type == PixelType_Gvsp_RGB8_Packed:
-        img_rgb = np.frombuffer(data_buf, dtype=np.uint8,
-                                count=width * height * 3)
-        img_rgb = img_rgb.reshape(height, width, 3)
-        img_bgr = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2BGR)
-
-    # --- 3) BayerRG8 → BGR (디모자이킹) --------------------------
-    elif pixel_type == PixelType_Gvsp_BayerRG8:
-        # 1채널 Bayer 패턴 이미지
-        img_bayer = np.frombuffer(data_buf, dtype=np.uint8,
-                                  count=width * height)
-        img_bayer = img_bayer.reshape(height, width)
-
-        # Bayer RG 패턴 → BGR 로 변환
-        img_bgr = cv2.cvtColor(img_bayer, cv2.COLOR_BAYER_RG2RGB)
-
-    else:
+    fmt = _PIXEL_FORMATS.get(pixel_type)
+    if fmt is None:
         print(f"[WARN] Unsupported pixel type: {pixel_type}")
         return None
 
-    return img_bgr
+    return buffer_to_bgr(data_buf, width, height, fmt)
 
 
 
@@ -197,12 +189,59 @@ def grab_frame_bgr(cam, data_buf, payload_size, timeout_ms: int = 1000):
 ROI_X0, ROI_Y0 = 100, 100    # TODO: 본인 카메라에 맞게 조정
 ROI_X1, ROI_Y1 = 1600, 1900  # TODO: 본인 카메라에 맞게 조정
 
+# ---------------------------
+# 결함 측정 / 판정 설정
+# ---------------------------
+MM_PER_PX = 0.05             # TODO: 캘리브레이션 값 (ROI 픽셀 1개 = mm)
+MASK_STRIDE = 4              # 마스크 다운샘플 간격 (클수록 빠르고 덜 정밀)
+REJECT_MIN_AREA_MM2 = {      # 이 면적 이상이면 불합격, 미만이면 허용 결함
+    "hole": 0.2,
+    "scratch": 0.5,
+    "burr": 0.3,
+}
+
+# ---------------------------
+# 유휴 프레임 게이트 설정 (장면 변화 없으면 추론 생략)
+# ---------------------------
+IDLE_GATE_METHOD = "diff"    # "diff"(썸네일 평균 절대차) / "dhash"(해시 해밍거리)
+IDLE_DIFF_THRES = 2.0        # diff 방식 임계값 (0~255 스케일 평균 절대차)
+IDLE_HASH_THRES = 4          # dhash 방식 임계값 (64bit 중 다른 비트 수)
+IDLE_REFRESH_SEC = 2.0       # 변화 없어도 이 주기(초)마다 강제 재추론 (0=사용 안 함)
+
+# ---------------------------
+# 부품(디스크) 단위 추적 / 판정 설정
+# ---------------------------
+PART_GAP_FRAMES = 5          # 움직임 없는 프레임이 이만큼 이어지면 디스크 통과 완료로 판단
+PART_MATCH_DIST = 80.0       # 프레임 간 같은 결함으로 볼 최대 이동 거리 (ROI 픽셀)
+PART_NG_MIN_HITS = 3         # 같은 결함이 이 횟수 이상 잡히면 NG 확정 → 이후 추론 생략
+# 결함 없는 추론 프레임이 이 값 이상이면 OK 조기 확정. 0 = 디스크가 다 지나갈 때까지 추론 (기본)
+# 컨베이어 위에서는 디스크가 ROI 에 다 들어오기 전에 clean 프레임이 쌓일 수 있음
+# → 뒷부분 결함을 못 보고 OK 가 되므로, 정지 상태로 촬영하는 라인에서만 켤 것
+PART_OK_MIN_FRAMES = 0
+
+# ---------------------------
+# 웹 UI 실시간 미리보기 (MJPEG) 설정
+# ---------------------------
+PREVIEW_WIDTH = 640          # 미리보기 가로 해상도 (세로는 비율 유지)
+PREVIEW_MAX_FPS = 10.0       # 미리보기 최대 fps (추론 fps 와 무관)
+PREVIEW_QUALITY = 70         # JPEG 품질
+
 def run_realtime_detection(
     model_path: str,
     cam_index: int = 0,
     conf_thres: float = 0.5,
-    show_window: bool = True
+    show_window: bool = True,
+    idle_gate: bool = True,
+    part_tracking: bool = True,
+    on_verdict=None,
+    preview_port: Optional[int] = 8090,
 ):
+    """
+    part_tracking: 디스크 단위로 결과를 묶어서 1개당 OK/NG 1건만 판정 (idle_gate 필요)
+    on_verdict   : 디스크 판정이 나올 때마다 호출할 콜백 (PLC 신호 / 로그 저장 등)
+                   인자: {"part_id", "verdict", "defects", "frames", "inferred", ...}
+    preview_port : 오버레이 프레임을 http://<PC>:<port>/stream.mjpg 로 송출 (None이면 사용 안 함)
+    """
     print("[INFO] Loading YOLO11 model...")
     model = YOLO(model_path)
 
@@ -212,6 +251,30 @@ def run_realtime_detection(
         2: "burr",
     }
 
+    gate = FrameGate(
+        method=IDLE_GATE_METHOD,
+        diff_thres=IDLE_DIFF_THRES,
+        hash_thres=IDLE_HASH_THRES,
+        refresh_sec=IDLE_REFRESH_SEC,
+    ) if idle_gate else None
+
+    # 부품 구간은 게이트의 idle 신호로 나누므로 게이트가 있을 때만 사용
+    tracker = PartTracker(
+        class_names,
+        gap_frames=PART_GAP_FRAMES,
+        match_dist=PART_MATCH_DIST,
+        ng_min_hits=PART_NG_MIN_HITS,
+        ok_min_frames=PART_OK_MIN_FRAMES,
+    ) if (part_tracking and gate is not None) else None
+    last_verdict = None
+
+    preview = PreviewStream(
+        port=preview_port,
+        width=PREVIEW_WIDTH,
+        max_fps=PREVIEW_MAX_FPS,
+        quality=PREVIEW_QUALITY,
+    ).start() if preview_port else None
+
     cam, data_buf, payload_size = open_hik_gige_camera(cam_index)
 
     try:
@@ -224,27 +287,67 @@ def run_realtime_detection(
             roi = frame[ROI_Y0:ROI_Y1, ROI_X0:ROI_X1]
 
             # 2) YOLO 추론은 ROI만 사용
-            results = model.predict(
-                source=roi,
-                imgsz=640,
-                conf=conf_thres,
-                verbose=False
-            )
-            r = results[0]
-
-            # 3) ROI 위에 박스 그리기
-            if r.boxes is not None:
-                boxes = r.boxes.xyxy.cpu().numpy()
-                cls_ids = r.boxes.cls.cpu().numpy()
-                scores = r.boxes.conf.cpu().numpy()
-
-                for box, cls_id, score in zip(boxes, cls_ids, scores):
-                    x1, y1, x2, y2 = box.astype(int)
-                    cls_id = int(cls_id)
+            #    장면 변화가 없으면 직전 결과 재사용 (컨베이어 공백 구간)
+            #    디스크 판정이 이미 확정됐으면 통과할 때까지 추론 생략
+            changed = gate is None or gate.changed(roi)
+
+            if tracker is not None:
+                verdict = tracker.step(gate.idle)
+                if verdict is not None:
+                    last_verdict = verdict
+                    found = " ".join(f"{k}:{v}" for k, v in verdict["defects"].items())
+                    print(
+                        f"[PART {verdict['part_id']}] {verdict['verdict']} {found} "
+                        f"(frames {verdict['frames']}, inferred {verdict['inferred']})"
+                    )
+                    if on_verdict is not None:
+                        on_verdict(verdict)
+
+            need_infer = tracker is None or tracker.needs_inference()
+            if not need_infer:
+                defects = None
+            elif changed:
+                results = model.predict(
+                    source=roi,
+                    imgsz=640,
+                    conf=conf_thres,
+                    verbose=False
+                )
+                # 마스크 일괄 후처리: 면적/길이/폭(mm), 센서 좌표, 합격/불합격
+                defects = measure_defects(
+                    results[0],
+                    class_names,
+                    mm_per_px=MM_PER_PX,
+                    reject_min_area_mm2=REJECT_MIN_AREA_MM2,
+                    roi_offset=(ROI_X0, ROI_Y0),
+                    stride=MASK_STRIDE,
+                )
+                if gate is not None:
+                    gate.update(defects)
+                if tracker is not None:
+                    rej = defects["reject"]
+                    tracker.update(
+                        defects["boxes"][rej],
+                        defects["cls"][rej],
+                        defects["scores"][rej],
+                    )
+            else:
+                defects = gate.result
+
+            # 3) ROI 위에 박스 그리기 (허용 결함은 회색)
+            if defects is not None:
+                for i in range(len(defects["cls"])):
+                    x1, y1, x2, y2 = defects["boxes"][i].astype(int)
+                    cls_id = int(defects["cls"][i])
                     label = class_names.get(cls_id, str(cls_id))
-                    txt = f"{label} {score:.2f}"
+                    txt = (
+                        f"{label} {defects['scores'][i]:.2f} "
+                        f"{defects['area_mm2'][i]:.2f}mm2 L{defects['length_mm'][i]:.1f}"
+                    )
 
-                    if label == "hole":
+                    if not defects["reject"][i]:
+                        color = (128, 128, 128)
+                    elif label == "hole":
                         color = (255, 0, 0)
                     elif label == "scratch":
                         color = (0, 255, 255)
@@ -265,7 +368,23 @@ def run_realtime_detection(
                         cv2.LINE_AA,
                     )
 
-            # 4) ROI만 화면에 출력 → 녹색 배경은 안 보임
+            if tracker is not None:
+                if tracker.verdict is not None:
+                    status = f"PART {tracker.part_id}: {tracker.verdict}"
+                elif last_verdict is not None:
+                    status = f"last PART {last_verdict['part_id']}: {last_verdict['verdict']}"
+                else:
+                    status = ""
+                if status:
+                    color = (0, 0, 255) if "NG" in status else (0, 255, 0)
+                    cv2.putText(roi, status, (10, 30), cv2.FONT_HERSHEY_SIMPLEX,
+                                0.9, color, 2, cv2.LINE_AA)
+
+            # 4) 웹 UI 미리보기 송출 (뷰어가 느려도 추론 루프는 기다리지 않음)
+            if preview is not None:
+                preview.publish(roi)
+
+            # 5) ROI만 화면에 출력 → 녹색 배경은 안 보임
             if show_window:
                 cv2.imshow("Hikrobot + YOLO11 realtime (ROI)", roi)
                 key = cv2.waitKey(1) & 0xFF
@@ -274,6 +393,8 @@ def run_realtime_detection(
 
     finally:
         close_hik_camera(cam)
+        if preview is not None:
+            preview.stop()
         if show_window:
             cv2.destroyAllWindows()
 
@@ -291,5 +412,8 @@ if __name__ == "__main__":
         model_path=MODEL_PATH,
         cam_index=0,       # 여러 대면 인덱스 변경
         conf_thres=0.5,    # 컨베이어에서 false-positive 많으면 0.6~0.7로 올려보기
-        show_window=True
+        show_window=True,
+        idle_gate=True,    # 공백 구간 추론 생략 (임계값은 IDLE_* 상수로 조정)
+        part_tracking=True, # 디스크 1개당 OK/NG 1건 판정 (PART_* 상수로 조정)
+        preview_port=8090   # 웹 UI 'Live' 미리보기 포트 (None이면 끔)
     )
@@ -0,0 +1,274 @@
+"""
+HikrobotGigE.py 추론 파이프라인 벤치마크 (카메라 / GPU 없이 실행 가능)
+- 합성 또는 녹화 프레임을 Mono8 / RGB8 / BayerRG8 원시 버퍼로 만들어서
+  실제 루프와 같은 단계(변환 → ROI → predict → 마스크 후처리)를 통과시킴
+- imgsz / batch / 스레드 수 조합마다 별도 프로세스로 실행 → 조합별 최대 RSS 를 독립적으로 측정
+- 결과: 포맷별 fps / 단계별 지연시간 p50/p95/p99, 최대 RSS → JSON 파일
+- 입력 버퍼는 포맷마다 원본 이미지 수(합성 8장)만큼만 만들어서 돌려 씀
+  → 최대 RSS 가 입력 버퍼 크기에 좌우되지 않음 (라인 PC 메모리 산정용)
+
+사용:
+    python benchmarks/bench_inference.py --imgsz 480 640 --batch 1 4 --threads 1 2 4
+    python benchmarks/bench_inference.py --recorded captures/ --formats BayerRG8
+    python benchmarks/bench_inference.py --skip-predict   # 카메라 쪽 변환/ROI 비용만
+"""
+
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from common import REPO, run_info, summarize, write_results  # noqa: E402
+
+DEFAULT_MODEL = REPO / "runs_yolo11" / "burr_seg_v1" / "weights" / "best.pt"
+# HikrobotGigE.py 의 ROI_X0, ROI_Y0, ROI_X1, ROI_Y1 과 같은 기본값
+DEFAULT_ROI = (100, 100, 1600, 1900)
+
+
+# ---------- 입력 프레임 ----------
+def _synthetic_bgr(width: int, height: int, seed: int):
+    """회색 배경 위 디스크 + 긁힘 몇 개 (프레임마다 위치가 조금씩 이동)"""
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    img = np.full((height, width, 3), 60, np.uint8)
+    cx = int(width * (0.3 + 0.4 * rng.random()))
+    cy = height // 2
+    r = int(min(width, height) * 0.35)
+    cv2.circle(img, (cx, cy), r, (170, 170, 170), -1)
+    cv2.circle(img, (cx, cy), r // 4, (40, 40, 40), -1)
+    for _ in range(3):
+        x0, y0 = cx + int(rng.integers(-r // 2, r // 2)), cy + int(rng.integers(-r // 2, r // 2))
+        cv2.line(img, (x0, y0), (x0 + 60, y0 + 20), (90, 90, 90), 3)
+    noise = rng.integers(0, 12, img.shape, dtype=np.uint8)
+    return cv2.add(img, noise)
+
+
+def _to_buffer(bgr, fmt: str) -> bytes:
+    """BGR 이미지를 카메라가 보내는 원시 버퍼 포맷으로 변환"""
+    import cv2
+    import numpy as np
+
+    if fmt == "Mono8":
+        return cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY).tobytes()
+    if fmt == "RGB8":
+        return cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB).tobytes()
+    if fmt == "BayerRG8":
+        # pixel_convert 의 COLOR_BAYER_RG2RGB 와 짝이 맞도록 모자이크 배치
+        h, w = bgr.shape[:2]
+        bayer = np.empty((h, w), np.uint8)
+        bayer[0::2, 0::2] = bgr[0::2, 0::2, 0]
+        bayer[0::2, 1::2] = bgr[0::2, 1::2, 1]
+        bayer[1::2, 0::2] = bgr[1::2, 0::2, 1]
+        bayer[1::2, 1::2] = bgr[1::2, 1::2, 2]
+        return bayer.tobytes()
+    raise ValueError(fmt)
+
+
+def _iter_sources(args):
+    """BGR 원본 이미지를 1장씩 생성 (녹화 폴더, 없으면 합성 8장). 최대 args.frames 장"""
+    import cv2
+
+    if args.recorded:
+        paths = [p for p in sorted(Path(args.recorded).iterdir())
+                 if p.suffix.lower() in (".png", ".jpg", ".jpeg", ".bmp")]
+        if not paths:
+            raise SystemExit(f"no images in {args.recorded}")
+        count = 0
+        for p in paths:
+            if count >= args.frames:
+                break
+            im = cv2.imread(str(p), cv2.IMREAD_COLOR)
+            if im is not None:
+                count += 1
+                yield im
+    else:
+        for s in range(min(8, args.frames)):
+            yield _synthetic_bgr(args.width, args.height, s)
+
+
+def _format_buffers(args, fmt: str) -> list:
+    """
+    [(width, height, bytearray), ...] 원본 1장당 버퍼 1개 — 측정 루프에서 순환해서 사용.
+    원본 BGR 은 변환 직후 버림 → 메모리에는 이 포맷의 버퍼만 남음
+    """
+    bufs = []
+    for bgr in _iter_sources(args):
+        h, w = bgr.shape[:2]
+        # SDK 의 data_buf 처럼 쓰기 가능한 버퍼로 전달
+        bufs.append((w, h, bytearray(_to_buffer(bgr, fmt))))
+    return bufs
+
+
+# ---------- 측정 (자식 프로세스) ----------
+def _peak_rss_mb():
+    try:
+        import psutil
+
+        mi = psutil.Process().memory_info()
+        peak = getattr(mi, "peak_wset", None) or getattr(mi, "peak_rss", None)
+        if peak:
+            return round(peak / 2**20, 1)
+    except ImportError:
+        pass
+    try:
+        import resource
+
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 는 KB, macOS 는 byte
+        return round(rss / (2**20 if sys.platform == "darwin" else 2**10), 1)
+    except ImportError:
+        return None
+
+
+def worker(cfg: dict) -> dict:
+    import cv2
+
+    sys.path.insert(0, str(REPO))
+    from defect_postprocess import measure_defects
+    from pixel_convert import buffer_to_bgr
+
+    cv2.setNumThreads(cfg["threads"])
+    model = None
+    if not cfg["skip_predict"]:
+        import torch
+        from ultralytics import YOLO
+
+        torch.set_num_threads(cfg["threads"])
+        model = YOLO(cfg["model"])
+
+    args = argparse.Namespace(**cfg)
+    x0, y0, x1, y1 = cfg["roi"]
+    batch = cfg["batch"]
+    names = model.names if model is not None else {}
+
+    def _predict(rois):
+        return model.predict(
+            source=rois if len(rois) > 1 else rois[0],
+            imgsz=cfg["imgsz"], conf=cfg["conf"], device=cfg["device"], verbose=False,
+        )
+
+    # 워밍업 (모델 초기화 / 메모리 할당 제외)
+    if model is not None:
+        roi = next(_iter_sources(args))[y0:y1, x0:x1]
+        for _ in range(cfg["warmup"]):
+            _predict([roi] * batch)
+
+    per_format = {}
+    input_bytes = 0
+    for fmt in cfg["formats"]:
+        # 포맷별 버퍼는 측정하는 동안만 유지
+        bufs = _format_buffers(args, fmt)
+        input_bytes = max(input_bytes, sum(len(b[2]) for b in bufs))
+        t_conv, t_roi, t_pred, t_post = [], [], [], []
+        t_start = time.perf_counter()
+        for i in range(0, cfg["frames"], batch):
+            rois = []
+            for k in range(i, min(i + batch, cfg["frames"])):
+                w, h, buf = bufs[k % len(bufs)]
+                t0 = time.perf_counter()
+                img = buffer_to_bgr(buf, w, h, fmt)
+                t1 = time.perf_counter()
+                rois.append(img[y0:y1, x0:x1])
+                t_conv.append(t1 - t0)
+                t_roi.append(time.perf_counter() - t1)
+
+            if model is None:
+                continue
+            t0 = time.perf_counter()
+            results = _predict(rois)
+            t_pred.append((time.perf_counter() - t0) / len(rois))  # 프레임당
+            for r in results:
+                t0 = time.perf_counter()
+                measure_defects(r, names, mm_per_px=0.05, reject_min_area_mm2={},
+                                roi_offset=(x0, y0))
+                t_post.append(time.perf_counter() - t0)
+        total = time.perf_counter() - t_start
+        del bufs
+
+        stages = {"convert": summarize(t_conv), "roi": summarize(t_roi)}
+        if t_pred:
+            stages["predict"] = summarize(t_pred)
+            stages["postprocess"] = summarize(t_post)
+        per_format[fmt] = {
+            "frames": cfg["frames"],
+            "fps": round(cfg["frames"] / total, 2),
+            "stages": stages,
+        }
+
+    return {
+        "formats": per_format,
+        "peak_rss_mb": _peak_rss_mb(),
+        # 가장 큰 포맷의 입력 버퍼 크기 (peak_rss_mb 에 포함되어 있음)
+        "input_buffers_mb": round(input_bytes / 2**20, 1),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--model", default=str(DEFAULT_MODEL),
+                    help="가중치 경로 (없으면 yolo11n-seg.pt 등 공개 가중치 이름)")
+    ap.add_argument("--recorded", type=Path, default=None, help="녹화 프레임 폴더 (png/jpg/bmp)")
+    ap.add_argument("--formats", nargs="+", default=["Mono8", "RGB8", "BayerRG8"])
+    ap.add_argument("--width", type=int, default=1920, help="합성 프레임 가로 (센서 해상도)")
+    ap.add_argument("--height", type=int, default=2000, help="합성 프레임 세로")
+    ap.add_argument("--roi", type=int, nargs=4, default=list(DEFAULT_ROI), metavar=("X0", "Y0", "X1", "Y1"))
+    ap.add_argument("--frames", type=int, default=50, help="포맷당 프레임 수")
+    ap.add_argument("--warmup", type=int, default=3)
+    ap.add_argument("--imgsz", type=int, nargs="+", default=[640])
+    ap.add_argument("--batch", type=int, nargs="+", default=[1])
+    ap.add_argument("--threads", type=int, nargs="+", default=[os.cpu_count() or 1])
+    ap.add_argument("--conf", type=float, default=0.5)
+    ap.add_argument("--device", default="cpu")
+    ap.add_argument("--skip-predict", action="store_true", help="모델 없이 변환/ROI 만 측정")
+    ap.add_argument("--out", type=Path, default=Path("bench_results_inference.json"))
+    ap.add_argument("--worker", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(json.loads(args.worker))))
+        return
+
+    base = {
+        "model": args.model, "recorded": str(args.recorded) if args.recorded else None,
+        "formats": args.formats, "width": args.width, "height": args.height,
+        "roi": args.roi, "frames": args.frames, "warmup": args.warmup,
+        "conf": args.conf, "device": args.device, "skip_predict": args.skip_predict,
+    }
+    out = {"suite": "inference", "env": run_info(), "config": base, "runs": []}
+
+    for imgsz, batch, threads in itertools.product(args.imgsz, args.batch, args.threads):
+        cfg = dict(base, imgsz=imgsz, batch=batch, threads=threads)
+        # 스레드 수는 라이브러리 import 전에 환경변수로도 고정
+        env = dict(os.environ, OMP_NUM_THREADS=str(threads), MKL_NUM_THREADS=str(threads))
+        proc = subprocess.run(
+            [sys.executable, __file__, "--worker", json.dumps(cfg)],
+            env=env, capture_output=True, text=True,
+        )
+        run = {"imgsz": imgsz, "batch": batch, "threads": threads}
+        if proc.returncode != 0:
+            run["error"] = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"
+            print(f"[WARN] imgsz={imgsz} batch={batch} threads={threads}: {run['error']}")
+        else:
+            run.update(json.loads(proc.stdout.strip().splitlines()[-1]))
+            for fmt, res in run["formats"].items():
+                conv = res["stages"]["convert"]
+                pred = res["stages"].get("predict", {})
+                print(f"  imgsz={imgsz:<5} batch={batch:<3} threads={threads:<3} {fmt:<9} "
+                      f"fps {res['fps']:>8.2f}  convert p95 {conv['p95_ms']:>7.2f} ms  "
+                      f"predict p95 {pred.get('p95_ms', float('nan')):>8.2f} ms")
+            print(f"  peak RSS {run['peak_rss_mb']} MB (input buffers {run['input_buffers_mb']} MB)")
+        out["runs"].append(run)
+
+    write_results(args.out, out)
+
+
+if __name__ == "__main__":
+    main()
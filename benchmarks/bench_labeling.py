@@ -0,0 +1,229 @@
+"""
+라벨링 API / 데이터 파이프라인 벤치마크
+- 합성 데이터(gen_synthetic.py)를 만들고 main.py 핸들러를 직접 호출해서 지연시간/처리량 측정
+- 변환 스크립트(coco_to_yolo.py, convert_json_to_yolo_seg.py)는 데이터 폴더에서 별도 프로세스로 실행
+- 결과는 JSON 파일로 저장 → 저장소 구조 변경 전/후 비교용
+
+사용:
+    python benchmarks/bench_labeling.py --n 1000 10000 --out bench_results.json
+    python benchmarks/bench_labeling.py --n 100000 --root D:/bench --skip-converters
+"""
+
+import argparse
+import importlib
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from common import REPO, run_info, summarize, timeit, write_results  # noqa: E402
+from gen_synthetic import LABELS, generate  # noqa: E402
+
+
+def _load_main(root: Path):
+    """LABELING_DATA_DIR 를 합성 데이터 폴더로 지정하고 main 을 새로 import"""
+    os.environ["LABELING_DATA_DIR"] = str(root)
+    if str(REPO) not in sys.path:
+        sys.path.insert(0, str(REPO))
+    if "main" in sys.modules:
+        return importlib.reload(sys.modules["main"])
+    return importlib.import_module("main")
+
+
+def _run_script(name: str, cwd: Path) -> float:
+    t0 = time.perf_counter()
+    subprocess.run(
+        [sys.executable, str(REPO / name)],
+        cwd=cwd, check=True, stdout=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - t0
+
+
+def bench_one(root: Path, n: int, project: str, samples: int, repeat: int,
+              converters: bool, points: int = 24, force: bool = False) -> dict:
+    t0 = time.perf_counter()
+    gen = generate(root, n, project=project, points=points, force=force)
+    print(f"[INFO] n={n}: generated in {time.perf_counter() - t0:.1f}s {gen}")
+
+    main = _load_main(root)
+    rng = random.Random(1)
+    ids = [p.stem for p in main.META.glob("*.json")]
+    pick = [rng.choice(ids) for _ in range(samples)]
+    res = {}
+
+    # 목록
+    res["list_images"] = summarize(
+        timeit(lambda: main.list_images(project=project), repeat), items_per_call=n
+    )
+
+    # 어노테이션 조회
+    res["get_annotations"] = summarize(
+        timeit(lambda iid: main.get_annotations(iid), samples, setup=lambda i: pick[i])
+    )
+
+    # 어노테이션 저장 (FastAPI 와 같은 pydantic 검증 포함)
+    payloads = [main.read_json(main.ann_path(iid), []) for iid in pick]
+    payloads = [p for p in payloads if p] or [[{"image_id": pick[0], "atype": "bbox",
+                                                  "bbox": [0, 0, 1, 1]}]]
+
+    def _save(arr):
+        items = [a.model_dump() for a in main._ann_list.validate_python(arr)]
+        main.store_annotations(main._prepare_anns(items))
+
+    res["save_annotations"] = summarize(
+        timeit(_save, len(payloads), setup=lambda i: payloads[i])
+    )
+
+    # 라벨이 바뀌는 저장: 같은 내용 재저장과 달리 통계 + 라벨 인덱스 갱신까지 포함
+    def _relabel(i):
+        arr = [dict(a) for a in payloads[i]]
+        cur = arr[0].get("label")
+        arr[0]["label"] = LABELS[(LABELS.index(cur) + 1) % len(LABELS)] if cur in LABELS else LABELS[0]
+        payloads[i] = arr
+        return arr
+
+    res["save_annotations_relabel"] = summarize(
+        timeit(_save, len(payloads), setup=_relabel)
+    )
+
+    # 어노테이션 본문 인코딩/디코딩: JSON(pydantic 검증) vs msgpack(points = float32 바이트)
+    import json
+
+    def _json_decode(body):
+        return [a.model_dump() for a in main._ann_list.validate_json(body)]
+
+    def _json_encode(arr):
+        return json.dumps(arr, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    json_bodies = [_json_encode(p) for p in payloads]
+    res["decode_annotations_json"] = summarize(
+        timeit(_json_decode, len(json_bodies), setup=lambda i: json_bodies[i])
+    )
+    res["encode_annotations_json"] = summarize(
+        timeit(_json_encode, len(payloads), setup=lambda i: payloads[i])
+    )
+    if main.msgpack is not None:
+        mp_bodies = [main._pack_anns(p) for p in payloads]
+        res["decode_annotations_msgpack"] = summarize(
+            timeit(main._unpack_anns, len(mp_bodies), setup=lambda i: mp_bodies[i])
+        )
+        res["encode_annotations_msgpack"] = summarize(
+            timeit(main._pack_anns, len(payloads), setup=lambda i: payloads[i])
+        )
+        res["decode_annotations_msgpack"]["bytes"] = sum(map(len, mp_bodies)) // len(mp_bodies)
+    res["decode_annotations_json"]["bytes"] = sum(map(len, json_bodies)) // len(json_bodies)
+
+    # 라벨 통계 / 라벨로 조회 (집계는 저장 때마다 증분 갱신됨)
+    res["project_stats"] = summarize(
+        timeit(lambda: main.project_stats(project=project), repeat), items_per_call=n
+    )
+    counts = main._project_state(project)["stats"]["labels"]
+    top = max(counts, key=counts.get, default="object")  # 가장 많은 라벨 = 최악의 경우
+    res["query_images"] = summarize(
+        timeit(lambda: main.query_images(project=project, label=[top]), repeat), items_per_call=n
+    )
+
+    # ZIP 내보내기: 캐시 없음(전체 생성) / 캐시 적중 / 어노테이션 1건 변경 후(증분)
+    def _drop_cache():
+        for p in main.EXPORT_CACHE.glob(main._cache_file(project, "*", "").name):
+            p.unlink(missing_ok=True)
+
+    def _touch_one(i):
+        _save(payloads[i % len(payloads)])
+
+    res["export_project_zip"] = summarize(
+        timeit(lambda _: main.export_project_zip(project=project), repeat, setup=lambda i: _drop_cache()),
+        items_per_call=n,
+    )
+    res["export_project_zip_cached"] = summarize(
+        timeit(lambda: main.export_project_zip(project=project), repeat), items_per_call=n
+    )
+    res["export_project_zip_incremental"] = summarize(
+        timeit(lambda _: main.export_project_zip(project=project), repeat, setup=_touch_one),
+        items_per_call=n,
+    )
+
+    # COCO 내보내기
+    coco_body = {}
+
+    def _export_coco():
+        resp = main.export_coco(project=project)
+        coco_body["raw"] = resp.body
+
+    res["export_coco"] = summarize(
+        timeit(lambda _: _export_coco(), repeat, setup=_touch_one), items_per_call=n
+    )
+    res["export_coco"]["bytes"] = len(coco_body["raw"])
+    res["export_coco_cached"] = summarize(timeit(_export_coco, repeat), items_per_call=n)
+
+    # 변환 스크립트 (프로세스 시작 시간 포함)
+    if converters:
+        labels = root / "dataset" / "labels"
+        res["convert_json_to_yolo_seg"] = summarize(
+            [_run_script("convert_json_to_yolo_seg.py", root)], items_per_call=n
+        )
+        for p in labels.glob("*.txt"):
+            p.unlink()
+        res["coco_to_yolo"] = summarize(
+            [_run_script("coco_to_yolo.py", root)], items_per_call=n
+        )
+
+    # COCO 저장 (annotations/ 를 덮어쓰므로 마지막에 실행)
+    coco = json.loads(coco_body["raw"])
+    payload = main.CocoPayload(**coco)
+    if payload.annotations:
+        def _save_coco():
+            out = main.save_coco(payload)
+            Path(out["file"]).unlink(missing_ok=True)
+
+        res["save_coco"] = summarize(timeit(_save_coco, 1), items_per_call=len(coco["annotations"]))
+
+    return {"dataset": gen, "results": res}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n", type=int, nargs="+", default=[1000], help="이미지 수 (여러 개면 차례로)")
+    ap.add_argument("--root", type=Path, default=None, help="합성 데이터 폴더 (기본: 임시 폴더)")
+    ap.add_argument("--project", default="default")
+    ap.add_argument("--samples", type=int, default=200, help="조회/저장 샘플 수")
+    ap.add_argument("--repeat", type=int, default=3, help="목록/내보내기 반복 횟수")
+    ap.add_argument("--points", type=int, default=24, help="폴리곤당 점 개수 (조밀한 폴리곤 측정용)")
+    ap.add_argument("--skip-converters", action="store_true")
+    ap.add_argument("--force", action="store_true",
+                    help="--root 가 비어있지 않은 폴더 / 저장소 폴더여도 덮어쓰기 (데이터 삭제됨)")
+    ap.add_argument("--out", type=Path, default=Path("bench_results.json"))
+    args = ap.parse_args()
+
+    tmp = None
+    if args.root is None:
+        tmp = tempfile.TemporaryDirectory(prefix="label_bench_")
+        args.root = Path(tmp.name)
+
+    out = {"suite": "labeling", "env": run_info(), "runs": {}}
+    try:
+        for n in args.n:
+            try:
+                run = bench_one(args.root, n, args.project, args.samples, args.repeat,
+                                converters=not args.skip_converters, points=args.points,
+                                force=args.force)
+            except ValueError as e:
+                ap.error(str(e))
+            out["runs"][str(n)] = run
+            for op, st in run["results"].items():
+                print(f"  n={n:>7} {op:<26} p50 {st['p50_ms']:>10.2f} ms  "
+                      f"p95 {st['p95_ms']:>10.2f} ms")
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+    write_results(args.out, out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+벤치마크 공용 유틸: 시간 측정 / 통계 / 결과 파일 저장
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+REPO = Path(__file__).resolve().parent.parent
+
+
+def summarize(samples_s: list, items_per_call: int = 1) -> dict:
+    """초 단위 측정값 리스트 → ms 통계 + 처리량"""
+    a = np.asarray(samples_s, dtype=np.float64) * 1000.0
+    total_s = float(a.sum()) / 1000.0
+    return {
+        "n": int(a.size),
+        "mean_ms": round(float(a.mean()), 3),
+        "p50_ms": round(float(np.percentile(a, 50)), 3),
+        "p95_ms": round(float(np.percentile(a, 95)), 3),
+        "p99_ms": round(float(np.percentile(a, 99)), 3),
+        "max_ms": round(float(a.max()), 3),
+        "ops_per_s": round(a.size / total_s, 2) if total_s > 0 else None,
+        "items_per_s": round(a.size * items_per_call / total_s, 2) if total_s > 0 else None,
+    }
+
+
+def timeit(fn, repeat: int, setup=None) -> list:
+    """fn() 을 repeat 번 실행한 소요 시간(초) 리스트. setup(i) 은 측정에서 제외"""
+    out = []
+    for i in range(repeat):
+        arg = setup(i) if setup is not None else None
+        t0 = time.perf_counter()
+        fn(arg) if setup is not None else fn()
+        out.append(time.perf_counter() - t0)
+    return out
+
+
+def run_info() -> dict:
+    """결과 비교용 실행 환경 정보"""
+    try:
+        rev = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        rev = None
+    return {
+        "git_rev": rev,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_results(path: Path, payload: dict):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    print(f"[INFO] results -> {path}")
@@ -0,0 +1,172 @@
+"""
+라벨링 서버 벤치마크용 합성 데이터 생성
+- <root>/storage, metadata, annotations : main.py 와 같은 구조 (uuid 이미지 + 폴리곤 어노테이션)
+- <root>/dataset/images, dataset/annotations.json : 변환 스크립트(coco_to_yolo.py, convert_json_to_yolo_seg.py) 입력
+
+사용:
+    python benchmarks/gen_synthetic.py --root /tmp/label_bench --n 10000
+
+주의: <root> 아래 storage / metadata / annotations / dataset (+ projects / jobs / .export_cache) 를 지우고 다시 만듦.
+      저장소 폴더나 합성 데이터가 아닌 비어있지 않은 폴더는 --force 없이 거부
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+import random
+import shutil
+from pathlib import Path
+
+from PIL import Image
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+# generate() 가 만든 폴더 표시 (다시 생성할 때 실제 데이터 폴더와 구분)
+MARKER = ".synthetic_bench"
+
+LABELS = ["hole", "scratch", "burr", "text_error", "cnt_error", "locate_error"]
+IMG_W, IMG_H = 640, 480
+
+
+def _jpeg_bytes() -> bytes:
+    # 모든 이미지가 같은 바이트를 공유 (헤더의 크기만 의미 있음)
+    buf = io.BytesIO()
+    Image.new("L", (IMG_W, IMG_H), 128).save(buf, format="JPEG", quality=80)
+    return buf.getvalue()
+
+
+def _polygon(rng: random.Random, n_points: int) -> list:
+    cx, cy = rng.uniform(50, IMG_W - 50), rng.uniform(50, IMG_H - 50)
+    r = rng.uniform(5, 40)
+    pts = []
+    for k in range(n_points):
+        a = 2 * math.pi * k / n_points
+        rr = r * rng.uniform(0.7, 1.3)
+        pts.append([round(cx + rr * math.cos(a), 2), round(cy + rr * math.sin(a), 2)])
+    return pts
+
+
+def _check_root(root: Path):
+    """실제 라벨링 데이터 / 학습 이미지를 지우지 않도록 대상 폴더 확인"""
+    root = root.resolve()
+    if root == REPO_ROOT:
+        raise ValueError(f"refusing to overwrite the repository folder {root} (use --force)")
+    if root.is_dir() and not (root / MARKER).exists() and any(root.iterdir()):
+        raise ValueError(
+            f"{root} is not empty and was not created by gen_synthetic.py (use --force)"
+        )
+
+
+def generate(
+    root: Path,
+    n: int,
+    project: str = "default",
+    polys: int = 4,
+    points: int = 24,
+    unlabeled_ratio: float = 0.1,
+    seed: int = 0,
+    force: bool = False,
+) -> dict:
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    if not force:
+        _check_root(root)
+        # --force 로 덮어쓴 실제 데이터 폴더는 표시하지 않음 → 다음에도 다시 확인
+        (root / MARKER).touch()
+    # projects/(통계/인덱스), jobs/, .export_cache/ 도 이전 데이터 기준이라 함께 삭제
+    # (남겨두면 새 데이터에 예전 통계 / 같은 리비전 번호의 예전 export 가 그대로 쓰임)
+    for sub in ("storage", "metadata", "annotations", "dataset", "projects", "jobs", ".export_cache"):
+        shutil.rmtree(root / sub, ignore_errors=True)
+    storage, meta, anns = root / "storage", root / "metadata", root / "annotations"
+    ds_img = root / "dataset" / "images"
+    for d in (storage, meta, anns, ds_img):
+        d.mkdir(parents=True, exist_ok=True)
+
+    rng = random.Random(seed)
+    jpeg = _jpeg_bytes()
+    coco = {
+        "categories": [{"id": i + 1, "name": lbl} for i, lbl in enumerate(LABELS)],
+        "images": [],
+        "annotations": [],
+    }
+    n_polys = 0
+
+    for i in range(n):
+        image_id = "%032x" % rng.getrandbits(128)
+        name = f"{image_id}.jpg"
+        (storage / name).write_bytes(jpeg)
+        try:
+            os.link(storage / name, ds_img / name)
+        except OSError:
+            (ds_img / name).write_bytes(jpeg)
+
+        info = {
+            "id": image_id,
+            "filename": f"img_{i:06d}.jpg",
+            "url": f"/storage/{name}",
+            "project": project,
+        }
+        (meta / f"{image_id}.json").write_text(json.dumps(info), encoding="utf-8")
+
+        arr = []
+        if rng.random() >= unlabeled_ratio:
+            for _ in range(rng.randint(1, polys * 2 - 1)):
+                pts = _polygon(rng, points)
+                label = rng.choice(LABELS)
+                xs, ys = [p[0] for p in pts], [p[1] for p in pts]
+                bbox = [min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys)]
+                arr.append(
+                    {
+                        "id": "%032x" % rng.getrandbits(128),
+                        "image_id": image_id,
+                        "atype": "polygon",
+                        "label": label,
+                        "bbox": None,
+                        "points": pts,
+                        "text": None,
+                        "attrs": None,
+                    }
+                )
+                coco["annotations"].append(
+                    {
+                        "id": len(coco["annotations"]) + 1,
+                        "image_id": i + 1,
+                        "category_id": LABELS.index(label) + 1,
+                        "segmentation": [[v for p in pts for v in p]],
+                        "bbox": bbox,
+                        "iscrowd": 0,
+                    }
+                )
+        n_polys += len(arr)
+        (anns / f"{image_id}.json").write_text(json.dumps(arr), encoding="utf-8")
+        coco["images"].append(
+            {"id": i + 1, "file_name": name, "width": IMG_W, "height": IMG_H}
+        )
+
+    with (root / "dataset" / "annotations.json").open("w", encoding="utf-8") as f:
+        json.dump(coco, f)
+
+    return {"images": n, "polygons": n_polys, "points_per_polygon": points}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--root", required=True, type=Path)
+    ap.add_argument("--n", type=int, default=1000)
+    ap.add_argument("--project", default="default")
+    ap.add_argument("--polys", type=int, default=4, help="이미지당 평균 폴리곤 수")
+    ap.add_argument("--points", type=int, default=24, help="폴리곤당 점 개수")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--force", action="store_true", help="비어있지 않은 폴더 / 저장소 폴더도 덮어쓰기")
+    args = ap.parse_args()
+    try:
+        stats = generate(args.root, args.n, args.project, args.polys, args.points,
+                         seed=args.seed, force=args.force)
+    except ValueError as e:
+        ap.error(str(e))
+    print(f"[INFO] generated {stats} under {args.root}")
+
+
+if __name__ == "__main__":
+    main()
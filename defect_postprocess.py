@@ -0,0 +1,119 @@
+"""
+YOLO11-Seg 마스크 후처리 / 결함 물리량 측정
+- 프레임의 모든 마스크를 한 번에(N, H, W) 배열 연산으로 처리 (검출별 파이썬 루프 없음)
+- 마스크는 stride 간격으로 줄여서 계산 → 면적은 stride^2 배로 보정
+- 면적(mm^2), 길이/폭(mm): 2차 모멘트(공분산) 고유값으로 회전된 결함도 측정
+    * 직사각형 L x W 영역의 주축 분산 = L^2 / 12 → L = sqrt(12 * λ1), W = sqrt(12 * λ2)
+- ROI 좌표 → 센서(전체 프레임) 좌표 오프셋 적용
+- 클래스별 최소 면적 기준으로 합격(accept) / 불합격(reject) 판정
+"""
+
+import numpy as np
+
+
+def _to_numpy(x):
+    if x is None:
+        return None
+    if hasattr(x, "cpu"):
+        x = x.cpu().numpy()
+    return np.asarray(x)
+
+
+def measure_defects(
+    r,
+    class_names: dict,
+    mm_per_px: float,
+    reject_min_area_mm2: dict,
+    roi_offset: tuple = (0, 0),
+    stride: int = 4,
+) -> dict:
+    """
+    r                  : ultralytics Results (r.boxes, r.masks 사용)
+    class_names        : {cls_id: label}
+    mm_per_px          : 캘리브레이션 상수 (ROI 픽셀 1개 = 몇 mm)
+    reject_min_area_mm2: {label: 최소 면적} 이 면적 이상이면 불합격, 라벨이 없으면 무조건 불합격
+    roi_offset         : (x0, y0) ROI 좌상단의 센서 좌표
+    stride             : 마스크 다운샘플 간격 (1이면 원본 해상도)
+
+    return: 길이 N 배열 dict
+        boxes(ROI xyxy), boxes_sensor(센서 xyxy), cls, scores,
+        area_mm2, length_mm, width_mm, reject(bool)
+    """
+    if r.boxes is None or len(r.boxes) == 0:
+        z = np.zeros(0, dtype=np.float32)
+        return {
+            "boxes": np.zeros((0, 4), dtype=np.float32),
+            "boxes_sensor": np.zeros((0, 4), dtype=np.float32),
+            "cls": np.zeros(0, dtype=int),
+            "scores": z, "area_mm2": z, "length_mm": z, "width_mm": z,
+            "reject": np.zeros(0, dtype=bool),
+        }
+
+    boxes = _to_numpy(r.boxes.xyxy).astype(np.float32)
+    cls_ids = _to_numpy(r.boxes.cls).astype(int)
+    scores = _to_numpy(r.boxes.conf).astype(np.float32)
+
+    if r.masks is not None:
+        # 마스크는 추론 입력(letterbox) 해상도 → ROI 픽셀로 환산할 배율 계산
+        data = r.masks.data
+        mh, mw = data.shape[1:]
+        oh, ow = r.masks.orig_shape[:2]
+        gain = min(mh / oh, mw / ow)
+        px = stride / gain                      # 다운샘플 마스크 1픽셀 = ROI px 픽셀
+
+        m = _to_numpy(data[:, ::stride, ::stride]).astype(np.float32)
+        ys = np.arange(m.shape[1], dtype=np.float32)
+        xs = np.arange(m.shape[2], dtype=np.float32)
+
+        row = m.sum(axis=2)                     # (N, H)
+        col = m.sum(axis=1)                     # (N, W)
+        n_px = row.sum(axis=1)
+        safe = np.maximum(n_px, 1.0)
+
+        mx = col @ xs / safe
+        my = row @ ys / safe
+        sxx = col @ (xs * xs) / safe - mx * mx
+        syy = row @ (ys * ys) / safe - my * my
+        sxy = (m @ xs) @ ys / safe - mx * my
+
+        # 2x2 공분산 고유값 (닫힌 형태)
+        tr = (sxx + syy) * 0.5
+        det = np.sqrt(np.maximum(((sxx - syy) * 0.5) ** 2 + sxy * sxy, 0.0))
+        lam1 = np.maximum(tr + det, 0.0)
+        lam2 = np.maximum(tr - det, 0.0)
+
+        area_px = n_px * px * px
+        length_px = np.sqrt(12.0 * lam1) * px
+        width_px = np.sqrt(12.0 * lam2) * px
+    else:
+        # 세그멘테이션 마스크가 없으면(detect 모델) 박스로 근사
+        bw = boxes[:, 2] - boxes[:, 0]
+        bh = boxes[:, 3] - boxes[:, 1]
+        area_px = bw * bh
+        length_px = np.maximum(bw, bh)
+        width_px = np.minimum(bw, bh)
+
+    area_mm2 = (area_px * mm_per_px * mm_per_px).astype(np.float32)
+    length_mm = (length_px * mm_per_px).astype(np.float32)
+    width_mm = (width_px * mm_per_px).astype(np.float32)
+
+    # 클래스별 최소 면적 테이블 (라벨 없는 클래스는 0 → 항상 불합격)
+    n_cls = max(int(cls_ids.max()) + 1, max(class_names, default=0) + 1)
+    min_area = np.zeros(n_cls, dtype=np.float32)
+    for cid, label in class_names.items():
+        min_area[cid] = reject_min_area_mm2.get(label, 0.0)
+    reject = area_mm2 >= min_area[cls_ids]
+
+    x0, y0 = roi_offset
+    boxes_sensor = boxes + np.array([x0, y0, x0, y0], dtype=np.float32)
+
+    return {
+        "boxes": boxes,
+        "boxes_sensor": boxes_sensor,
+        "cls": cls_ids,
+        "scores": scores,
+        "area_mm2": area_mm2,
+        "length_mm": length_mm,
+        "width_mm": width_mm,
+        "reject": reject,
+    }
@@ -0,0 +1,123 @@
+"""
+프리런(TriggerMode OFF) 카메라용 유휴 프레임 게이트
+- 컨베이어 공백 구간에서 같은 장면이 반복될 때 YOLO 추론을 건너뛰기 위한 사전 필터
+- ROI를 작은 그레이 썸네일로 줄여서 직전 프레임과 비교 (평균 절대차 또는 dHash)
+- 변화가 없으면 직전 추론 결과를 재사용하고, 일정 주기마다 강제 갱신
+- 직전 프레임과의 움직임 여부(idle)도 함께 계산 → 부품 단위 추적(part_tracker)에서 사용
+
+사용 예:
+    gate = FrameGate(diff_thres=2.0, refresh_sec=2.0)
+    if gate.changed(roi):
+        r = model.predict(roi, ...)[0]
+        gate.update(r)
+    else:
+        r = gate.result
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+
+class FrameGate:
+    """
+    직전 '추론한' 프레임과 현재 프레임을 싸게 비교해서 추론 필요 여부를 판단.
+
+    method:
+        "diff"  : 썸네일 평균 절대차(0~255 스케일)가 diff_thres 이상이면 변화
+        "dhash" : 64bit difference hash 해밍거리가 hash_thres 이상이면 변화
+    refresh_sec / refresh_frames:
+        변화가 없어도 이 시간(초) 또는 프레임 수가 지나면 강제로 다시 추론 (0이면 사용 안 함)
+    """
+
+    def __init__(
+        self,
+        method: str = "diff",
+        diff_thres: float = 2.0,
+        hash_thres: int = 4,
+        thumb_size: int = 64,
+        refresh_sec: float = 2.0,
+        refresh_frames: int = 0,
+    ):
+        if method not in ("diff", "dhash"):
+            raise ValueError(f"unknown gate method: {method}")
+        self.method = method
+        self.diff_thres = diff_thres
+        self.hash_thres = hash_thres
+        self.thumb_size = thumb_size
+        self.refresh_sec = refresh_sec
+        self.refresh_frames = refresh_frames
+
+        self.result = None          # 직전 추론 결과 (재사용 대상)
+        self.last_score = 0.0       # 직전 비교 점수 (로그/튜닝용)
+        self.idle = False           # 바로 앞 프레임 대비 움직임이 없으면 True
+        self.skipped = 0            # 누적 스킵 프레임 수
+        self._ref = None            # 기준 썸네일 또는 해시
+        self._pending = None        # 이번 프레임 썸네일 (update 시 기준으로 승격)
+        self._prev = None           # 바로 앞 프레임 썸네일 (idle 판단용)
+        self._ref_time = 0.0
+        self._since_ref = 0
+
+    # ---------- 썸네일 / 시그니처 ----------
+    def _thumb(self, img: np.ndarray) -> np.ndarray:
+        if img.ndim == 3:
+            img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        if self.method == "dhash":
+            # 9x8 로 줄이고 가로 방향 인접 픽셀 대소 비교 → 64bit
+            small = cv2.resize(img, (9, 8), interpolation=cv2.INTER_AREA)
+            return np.packbits(small[:, 1:] > small[:, :-1])
+        s = self.thumb_size
+        return cv2.resize(img, (s, s), interpolation=cv2.INTER_AREA)
+
+    def _distance(self, sig: np.ndarray, ref: np.ndarray) -> float:
+        if self.method == "dhash":
+            return float(np.unpackbits(np.bitwise_xor(sig, ref)).sum())
+        return float(cv2.absdiff(sig, ref).mean())
+
+    @property
+    def _thres(self) -> float:
+        return self.hash_thres if self.method == "dhash" else self.diff_thres
+
+    # ---------- 판단 ----------
+    def changed(self, img: np.ndarray) -> bool:
+        """
+        추론이 필요하면 True.
+        True 를 받은 호출자는 추론 후 update(result) 로 기준 프레임을 갱신해야 함.
+        """
+        sig = self._thumb(img)
+        self._pending = sig
+
+        # 추론 여부와 별개로, 연속 프레임 간 움직임 여부는 항상 갱신
+        if self._prev is not None:
+            self.idle = self._distance(sig, self._prev) < self._thres
+        self._prev = sig
+
+        if self._ref is None or self.result is None:
+            return True
+
+        self._since_ref += 1
+        if self.refresh_sec > 0 and time.monotonic() - self._ref_time >= self.refresh_sec:
+            return True
+        if self.refresh_frames > 0 and self._since_ref >= self.refresh_frames:
+            return True
+
+        self.last_score = self._distance(sig, self._ref)
+        if self.last_score >= self._thres:
+            return True
+
+        self.skipped += 1
+        return False
+
+    def update(self, result):
+        """방금 추론한 프레임을 새 기준으로 삼고 결과를 저장"""
+        self._ref = self._pending
+        self._ref_time = time.monotonic()
+        self._since_ref = 0
+        self.result = result
+
+    def reset(self):
+        self.result = None
+        self.idle = False
+        self._ref = None
+        self._prev = None
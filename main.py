@@ -1,11 +1,23 @@
 import os
+import re
+import glob
 import uuid
 import json
+import gzip
 import shutil
+import hashlib
+import mimetypes
 import tempfile
+import threading
 import time
+import zlib
+import copy
+import struct
+import zipfile
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Optional, Any, Literal, Dict
+from typing import List, Optional, Any, Literal, Dict, Annotated
+from urllib.parse import quote, unquote
 
 from fastapi import (
     FastAPI,
@@ -13,28 +25,83 @@ from fastapi import (
     File,
     Form,
     HTTPException,
+    Header,
     Query,
     Request,
+    Response,
 )
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse
-from pydantic import BaseModel
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from starlette.concurrency import run_in_threadpool
+
+try:  # 선택 의존성: 있으면 zstd 압축도 협상
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:  # 선택 의존성: 어노테이션 바이너리 전송 (application/msgpack)
+    import msgpack
+    import numpy as np
+except ImportError:
+    msgpack = None
+    np = None
 
 # ---------- paths ----------
 ROOT = Path(__file__).parent.resolve()
-STORAGE = ROOT / "storage"
-STORAGE.mkdir(exist_ok=True)
 
-META = ROOT / "metadata"
+# 데이터 폴더 (기본: 코드와 같은 위치). 벤치마크/배포 시 LABELING_DATA_DIR 로 분리 가능
+DATA = Path(os.environ.get("LABELING_DATA_DIR", ROOT)).resolve()
+
+STORAGE = DATA / "storage"
+STORAGE.mkdir(parents=True, exist_ok=True)
+
+META = DATA / "metadata"
 META.mkdir(exist_ok=True)
 
-ANNS = ROOT / "annotations"
+ANNS = DATA / "annotations"
 ANNS.mkdir(exist_ok=True)
 
 PUBLIC = ROOT / "public"
 PUBLIC.mkdir(exist_ok=True)
 
+JOBS = DATA / "jobs"
+JOBS.mkdir(exist_ok=True)
+
+# 프로세스 간 잠금 파일 (uvicorn --workers N 으로 여러 프로세스가 같은 폴더를 쓸 때)
+# 어노테이션 잠금 안에서 프로젝트 잠금을 잡으므로(ann → proj) 두 종류는 잠금 파일을 따로 씀
+# → 같은 파일을 공유하면 서로 반대 순서로 기다리는 교착이 생김
+LOCKS = DATA / ".locks"
+LOCKS.mkdir(exist_ok=True)
+ANN_LOCKS = LOCKS / "ann"
+ANN_LOCKS.mkdir(exist_ok=True)
+LOCK_STRIPES = 256
+
+# 프로젝트별 상태 (리비전 등)
+PROJECTS = DATA / "projects"
+PROJECTS.mkdir(exist_ok=True)
+
+# export 결과 캐시 (프로젝트 리비전 기준). 전체 크기가 상한을 넘으면 오래된 것부터 삭제
+# 키가 프로젝트 이름 + 리비전뿐이라 데이터 폴더마다 따로 둬야 함 (공용 temp 에 두면 다른 DATA 와 섞임)
+EXPORT_CACHE = DATA / ".export_cache"
+EXPORT_CACHE.mkdir(exist_ok=True)
+EXPORT_CACHE_MAX_BYTES = int(os.environ.get("EXPORT_CACHE_MAX_BYTES", str(2 << 30)))
+# 이 시간(초)보다 오래된 임시 파일 / 예전 방식 export ZIP 은 정리
+EXPORT_STALE_SEC = 3600
+
+# JSON 응답 압축 기준 (이보다 작으면 압축 오버헤드가 더 큼)
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "2048"))
+
+# 사전 라벨링(pre-labeling)용 학습 모델
+MODEL_PATH = Path(
+    os.environ.get(
+        "PRELABEL_MODEL", ROOT / "runs_yolo11" / "burr_seg_v1" / "weights" / "best.pt"
+    )
+)
+PRELABEL_BATCH = int(os.environ.get("PRELABEL_BATCH", "8"))
+
 # ---------- app ----------
 app = FastAPI(title="Labeling API (file-only + export)")
 app.add_middleware(
@@ -43,21 +110,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
-# 이미지 파일 정적 서빙
-app.mount("/storage", StaticFiles(directory=str(STORAGE)), name="storage")
+# 이미지 파일은 /storage/{name} 라우트에서 캐시 헤더와 함께 서빙 (아래 참고)
 app.mount("/assets", StaticFiles(directory=str(PUBLIC)), name="assets")
 
 
 # ---------- schemas ----------
+# [x, y] — 좌표가 2개가 아니면 COCO/YOLO export 에서 깨짐
+Point = Annotated[list[float], Field(min_length=2, max_length=2)]
+
+
 class AnnIn(BaseModel):
     id: Optional[str] = None
     image_id: str
     atype: Literal["bbox", "polygon", "mask", "text"] = "bbox"
     label: str = "object"
     bbox: Optional[list[float]] = None
-    points: Optional[list[list[float]]] = None
+    points: Optional[list[Point]] = None
     text: Optional[str] = None
     attrs: Optional[dict[str, Any]] = None
 
@@ -66,6 +137,9 @@ class AnnOut(AnnIn):
     id: str
 
 
+_ann_list = TypeAdapter(List[AnnIn])
+
+
 # COCO payload
 class CocoPayload(BaseModel):
     licenses: Optional[list] = None
@@ -75,6 +149,15 @@ class CocoPayload(BaseModel):
     annotations: list
 
 
+# 일괄 작업
+class ImageIds(BaseModel):
+    ids: List[str]
+
+
+class MoveImages(ImageIds):
+    project: str
+
+
 # ---------- helpers ----------
 def _ensure_dir(p: Path):
     p.parent.mkdir(parents=True, exist_ok=True)
@@ -106,11 +189,457 @@ def read_json(p: Path, default):
 
 
 def write_json(p: Path, obj):
+    """
+    임시 파일에 쓰고 rename → 읽는 쪽은 항상 완전한 파일만 봄.
+    임시 파일 이름은 호출마다 고유 (여러 워커가 같은 파일을 써도 서로의 tmp 를 덮지 않음)
+    """
+    _ensure_dir(p)
+    fd, tmp = tempfile.mkstemp(dir=p.parent, prefix=p.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(obj, f, ensure_ascii=False)
+        _replace(tmp, p)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _replace(src: str, dst: Path, retries: int = 20):
+    # Windows 는 다른 프로세스가 dst 를 읽는 중이면 PermissionError → 잠시 후 재시도
+    for i in range(retries):
+        try:
+            os.replace(src, dst)
+            return
+        except PermissionError:
+            if i == retries - 1:
+                raise
+            time.sleep(0.01 * (i + 1))
+
+
+# ---------- 프로세스 간 잠금 ----------
+if os.name == "nt":
+    import msvcrt
+
+    def _lock_fd(fd: int):
+        os.lseek(fd, 0, os.SEEK_SET)
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)  # 내부적으로 ~10초 재시도
+                return
+            except OSError:
+                continue
+
+    def _unlock_fd(fd: int):
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def _lock_fd(fd: int):
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+    def _unlock_fd(fd: int):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+@contextmanager
+def file_lock(key: str, base: Path = LOCKS):
+    """
+    key 단위 배타 잠금. 프로세스/스레드 모두 직렬화됨.
+    잠금 파일이 무한히 늘지 않도록 key 를 LOCK_STRIPES 개 슬롯으로 해시.
+    같은 base 의 잠금끼리는 중첩하지 말 것 (다른 key 도 같은 슬롯일 수 있음).
+    중첩 순서는 ann_lock → file_lock(proj/export/job) 한 방향만 허용
+    """
+    slot = zlib.crc32(key.encode("utf-8")) % LOCK_STRIPES
+    fd = os.open(str(base / f"{slot:03d}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        _lock_fd(fd)
+        try:
+            yield
+        finally:
+            _unlock_fd(fd)
+    finally:
+        os.close(fd)
+
+
+def ann_lock(image_id: str):
+    """이미지 1장의 메타/어노테이션 잠금 (프로젝트/export/job 잠금과 다른 잠금 파일)"""
+    return file_lock(f"ann:{image_id}", ANN_LOCKS)
+
+
+def read_ann_with_etag(image_id: str):
+    """(어노테이션 리스트, ETag) — ETag 는 파일 내용 해시 (compare-and-swap 용)"""
+    p = ann_path(image_id)
+    try:
+        raw = p.read_bytes()
+    except FileNotFoundError:
+        return [], '"0"'
+    etag = '"' + hashlib.sha1(raw).hexdigest()[:16] + '"'
+    return json.loads(raw.decode("utf-8")), etag
+
+
+def write_ann(image_id: str, arr: list, changes: Optional[dict] = None) -> str:
+    """
+    저장 후 새 ETag 반환 (read_ann_with_etag 와 같은 방식).
+    ann_lock 안에서 호출 → 이전 내용과 비교해서 프로젝트 리비전 / 라벨 통계를 갱신
+    changes 를 주면 바로 반영하지 않고 {project: [변경]} 에 모음 (여러 장 저장 후 한 번에 record_changes)
+    """
+    raw = json.dumps(arr, ensure_ascii=False, default=_json_default).encode("utf-8")
+    p = ann_path(image_id)
     _ensure_dir(p)
-    tmp = str(p) + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(obj, f, ensure_ascii=False)
-    os.replace(tmp, p)
+    old, _ = read_ann_with_etag(image_id)
+    fd, tmp = tempfile.mkstemp(dir=p.parent, prefix=p.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(raw)
+        _replace(tmp, p)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    project = _project_of(image_id)
+    change = (image_id, _ann_summary(old), _ann_summary(arr))
+    if changes is None:
+        record_changes(project, [change])
+    elif project is not None:
+        changes.setdefault(project, []).append(change)
+    return '"' + hashlib.sha1(raw).hexdigest()[:16] + '"'
+
+
+# ---------- 프로젝트 상태 (리비전 / 라벨 통계) ----------
+# PROJECTS/<project>.json                         : 리비전 + 집계 (이미지 수, 라벨/타입별 개수, 미라벨 이미지 수)
+# PROJECTS/<project>/label/<label>/<image_id>.json: 그 이미지의 해당 라벨 개수 (라벨로 이미지 조회)
+# PROJECTS/<project>/unlabeled/<image_id>.json    : 확정 라벨이 없는 이미지
+# 저장/삭제마다 바뀐 이미지의 차이(delta)만 반영 → 저장 1건은 바뀐 라벨 수만큼의 작은 파일만 씀
+# (라벨별 파일 하나에 모으면 저장마다 이미지 수에 비례하는 파일을 다시 써야 함)
+STATS_INDEX_VERSION = 2
+
+
+def project_path(project: str) -> Path:
+    return PROJECTS / f"{quote(project, safe='')}.json"
+
+
+def _index_dir(project: str, label: Optional[str] = None) -> Path:
+    base = PROJECTS / quote(project, safe="")
+    if label is None:
+        return base / "unlabeled"
+    return base / "label" / quote(label, safe="")
+
+
+def _index_marker(project: str, label: Optional[str], image_id: str) -> Path:
+    return _index_dir(project, label) / f"{quote(image_id, safe='')}.json"
+
+
+def _read_index(project: str, label: Optional[str]) -> Dict[str, int]:
+    """{image_id: 개수} — 조회 결과 수만큼 작은 파일을 읽음"""
+    d = _index_dir(project, label)
+    if not d.is_dir():
+        return {}
+    out = {}
+    for e in os.scandir(d):
+        if not e.name.endswith(".json"):
+            continue  # 쓰는 중인 *.tmp
+        n = 1 if label is None else read_json(Path(e.path), 0)
+        if n > 0:
+            out[unquote(e.name[:-5])] = n
+    return out
+
+
+def project_revision(project: str) -> int:
+    return int(read_json(project_path(project), {}).get("revision", 0))
+
+
+def _project_of(image_id: str) -> Optional[str]:
+    meta = read_json(meta_path(image_id), None)
+    return meta.get("project") if meta else None
+
+
+def _ann_summary(arr: list) -> dict:
+    """이미지 1장의 집계. 모델 제안(suggested)은 검수 전이라 라벨 수에서 제외"""
+    labels: Dict[str, int] = {}
+    atypes: Dict[str, int] = {}
+    suggested = 0
+    for a in arr:
+        if (a.get("attrs") or {}).get("suggested"):
+            suggested += 1
+            continue
+        label = a.get("label", "object")
+        atype = a.get("atype", "bbox")
+        labels[label] = labels.get(label, 0) + 1
+        atypes[atype] = atypes.get(atype, 0) + 1
+    return {"labels": labels, "atypes": atypes, "suggested": suggested}
+
+
+def _empty_stats() -> dict:
+    return {"images": 0, "unlabeled": 0, "suggested": 0, "labels": {}, "atypes": {}}
+
+
+def _add_counts(total: dict, counts: dict, sign: int):
+    for k, v in counts.items():
+        n = total.get(k, 0) + sign * v
+        if n:
+            total[k] = n
+        else:
+            total.pop(k, None)
+
+
+def _apply_changes(project: str, stats: dict, changes: list):
+    """
+    changes: [(image_id, 이전 집계, 새 집계)]  None = 이미지 없음(업로드 전 / 삭제 후)
+    집계와 인덱스 모두 차이를 더하는 방식 → 변경을 모아서/순서가 바뀌어 반영해도 결과가 같음
+    """
+    touched: Dict[Optional[str], Dict[str, int]] = {}  # 인덱스(라벨, None=미라벨) → {id: 증감}
+    for iid, old, new in changes:
+        for summ, sign in ((old, -1), (new, 1)):
+            if summ is None:
+                continue
+            stats["images"] += sign
+            stats["suggested"] += sign * summ["suggested"]
+            if not summ["labels"]:
+                stats["unlabeled"] += sign
+            _add_counts(stats["labels"], summ["labels"], sign)
+            _add_counts(stats["atypes"], summ["atypes"], sign)
+
+        old_l = old["labels"] if old else {}
+        new_l = new["labels"] if new else {}
+        for label in set(old_l) | set(new_l):
+            d = new_l.get(label, 0) - old_l.get(label, 0)
+            if d:
+                upd = touched.setdefault(label, {})
+                upd[iid] = upd.get(iid, 0) + d
+        was_unl = old is not None and not old_l
+        is_unl = new is not None and not new_l
+        if was_unl != is_unl:
+            upd = touched.setdefault(None, {})
+            upd[iid] = upd.get(iid, 0) + int(is_unl) - int(was_unl)
+
+    # 개수가 바뀐 (라벨, 이미지) 표시 파일만 갱신 (점 위치만 고친 저장은 인덱스 쓰기 없음)
+    for label, upd in touched.items():
+        for iid, d in upd.items():
+            p = _index_marker(project, label, iid)
+            n = read_json(p, 0) + d
+            if n > 0:
+                p.parent.mkdir(parents=True, exist_ok=True)
+                write_json(p, n)
+            else:
+                p.unlink(missing_ok=True)
+
+
+def _stats_ready(state: Optional[dict]) -> bool:
+    return bool(state) and "stats" in state and state.get("index") == STATS_INDEX_VERSION
+
+
+def _rebuild_project_state(project: str, state: dict):
+    """전체 스캔으로 집계/인덱스 재생성 (통계가 없던 기존 데이터, 외부에서 파일을 고친 경우)"""
+    shutil.rmtree(PROJECTS / quote(project, safe=""), ignore_errors=True)
+    changes = []
+    for p in META.glob("*.json"):
+        meta = read_json(p, None)
+        if not meta or meta.get("project") != project:
+            continue
+        arr = read_json(ann_path(meta["id"]), [])
+        changes.append((meta["id"], None, _ann_summary(arr)))
+    state["stats"] = _empty_stats()
+    state["index"] = STATS_INDEX_VERSION
+    _apply_changes(project, state["stats"], changes)
+
+
+def record_all(changes: dict):
+    """{project: [변경]} 을 프로젝트별로 한 번씩 반영 (여러 장을 처리한 뒤)"""
+    for project, chg in changes.items():
+        record_changes(project, chg)
+
+
+def record_changes(project: Optional[str], changes: list):
+    """
+    프로젝트 내용이 바뀔 때마다 호출: 리비전 +1 (export 캐시 키), 라벨 통계에 delta 반영.
+    changes 는 _apply_changes 와 같은 형식. 이미 파일에 반영된 뒤에 호출해야 함
+    """
+    if project is None:
+        return
+    with file_lock(f"proj:{project}"):
+        state = read_json(project_path(project), {"project": project})
+        state["revision"] = int(state.get("revision", 0)) + 1
+        state["updated"] = time.time()
+        if _stats_ready(state):
+            _apply_changes(project, state["stats"], changes)
+        else:
+            # 처음 한 번(또는 인덱스 형식이 바뀐 뒤)은 전체 스캔 (현재 파일 상태에 이번 변경도 이미 포함됨)
+            _rebuild_project_state(project, state)
+        write_json(project_path(project), state)
+
+
+# ---------- HTTP 캐시 / 압축 ----------
+def _strip_weak(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    """If-None-Match 약한 비교 (W/ 접두사 무시)"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    target = _strip_weak(etag)
+    return any(_strip_weak(t.strip()) == target for t in header.split(","))
+
+
+def _accepts(request: Request, coding: str) -> bool:
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() != coding:
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                return float(q[2:]) > 0
+            except ValueError:
+                return True
+        return True
+    return False
+
+
+def bytes_response(
+    request: Optional[Request],
+    body: bytes,
+    media_type: str = "application/json",
+    etag: Optional[str] = None,
+    headers: Optional[dict] = None,
+) -> Response:
+    """
+    - ETag + If-None-Match → 304 (재방문 시 본문 전송 없음)
+    - COMPRESS_MIN_BYTES 이상이면 zstd(가능하면) 또는 gzip 압축
+      압축된 응답의 ETag 는 nginx 처럼 약한 ETag(W/) 로 표시
+    """
+    h = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    h.update(headers or {})
+    h["ETag"] = etag or '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+    if request is None:
+        return Response(content=body, media_type=media_type, headers=h)
+
+    if _etag_matches(request.headers.get("if-none-match"), h["ETag"]):
+        return Response(status_code=304, headers=h)
+
+    if len(body) >= COMPRESS_MIN_BYTES:
+        if zstandard is not None and _accepts(request, "zstd"):
+            body = zstandard.ZstdCompressor(level=3).compress(body)
+            h["Content-Encoding"] = "zstd"
+        elif _accepts(request, "gzip"):
+            body = gzip.compress(body, compresslevel=5)
+            h["Content-Encoding"] = "gzip"
+        if "Content-Encoding" in h:
+            h["ETag"] = "W/" + h["ETag"]
+    return Response(content=body, media_type=media_type, headers=h)
+
+
+def json_response(request: Optional[Request], obj, etag: Optional[str] = None) -> Response:
+    body = json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return bytes_response(request, body, "application/json", etag=etag)
+
+
+# ---------- 바이너리 전송 포맷 (msgpack) ----------
+# Content-Type / Accept 가 application/msgpack 이면 어노테이션을 MessagePack 으로 주고받음
+# - points: float32 little-endian [x0, y0, x1, y1, ...] 바이트 (bin) → np.frombuffer 로 바로 배열화
+# - 나머지 필드는 JSON 과 같음. JSON 클라이언트는 그대로 동작
+# - 좌표는 float32 로 전송 (픽셀 좌표 기준 오차 < 0.001px)
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+
+def _is_msgpack(request: Request) -> bool:
+    ctype = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    return ctype in MSGPACK_TYPES
+
+
+def _wants_msgpack(request: Optional[Request]) -> bool:
+    if request is None or msgpack is None:
+        return False
+    accept = request.headers.get("accept", "").lower()
+    return any(t in accept for t in MSGPACK_TYPES)
+
+
+def _pack_anns(arr: list) -> bytes:
+    out = []
+    for a in arr:
+        pts = a.get("points")
+        if pts is not None and len(pts):  # 리스트(파일에서 읽음) 또는 numpy 배열(msgpack 요청)
+            a = dict(a)
+            a["points"] = np.asarray(pts, dtype="<f4").tobytes()
+        out.append(a)
+    return msgpack.packb(out, use_bin_type=True)
+
+
+def _unpack_anns(body: bytes) -> list:
+    """
+    msgpack 본문 → AnnIn 과 같은 형태의 dict 리스트.
+    바이트로 온 points 를 빼고 나머지는 JSON 경로와 같은 검증(_ann_list) → 받아들이는 값이 JSON 과 동일.
+    points 는 (n, 2) float32 배열로 그대로 두고 파일/JSON 응답에 쓸 때만 리스트로 변환 (_json_default)
+    """
+    try:
+        items = msgpack.unpackb(body, raw=False)
+    except (ValueError, msgpack.UnpackException) as e:
+        raise HTTPException(400, f"invalid msgpack body: {e}")
+    if not isinstance(items, list):
+        raise HTTPException(422, "expected a list of annotations")
+
+    arrays = {}
+    for i, a in enumerate(items):
+        if not isinstance(a, dict):
+            continue  # 아래 검증에서 422
+        pts = a.get("points")
+        if isinstance(pts, (bytes, bytearray)):
+            if len(pts) % 8:
+                raise HTTPException(422, f"[{i}] points must be float32 x/y pairs")
+            arrays[i] = np.frombuffer(pts, dtype="<f4").reshape(-1, 2)
+            a["points"] = None
+        bbox = a.get("bbox")
+        if isinstance(bbox, (bytes, bytearray)):
+            if len(bbox) % 4:
+                raise HTTPException(422, f"[{i}] bbox must be float32 values")
+            a["bbox"] = np.frombuffer(bbox, dtype="<f4").tolist()
+
+    try:
+        # points 를 뺀 나머지는 작음 → JSON 으로 바꿔서 같은 검증기 사용 (바이트 값은 여기서 거부)
+        rest = json.dumps(items).encode("utf-8")
+    except TypeError:
+        raise HTTPException(422, "binary values are only allowed for points / bbox")
+    try:
+        out = [a.model_dump() for a in _ann_list.validate_json(rest)]
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False))
+    for i, pts in arrays.items():
+        out[i]["points"] = pts
+    return out
+
+
+def _json_default(o):
+    """
+    msgpack 으로 받은 points(float32 배열) → 저장 / JSON 응답 시점에만 리스트로.
+    float32 를 그대로 float 로 바꾸면 0.3 → 0.30000001192092896 처럼 보낸 값과 달라지므로
+    float32 최단 표현(10진 문자열)을 거쳐 변환 → JSON 으로 보낸 것과 같은 값으로 저장
+    """
+    if np is not None and isinstance(o, np.ndarray):
+        if o.dtype == np.float32:
+            o = o.astype(str).astype(np.float64)
+        return o.tolist()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def ann_response(request: Optional[Request], arr: list, etag: str) -> Response:
+    """Accept 에 따라 JSON / msgpack. 같은 버전이면 ETag 도 같음 (If-Match 에 그대로 사용)"""
+    if _wants_msgpack(request):
+        return bytes_response(
+            request, _pack_anns(arr), MSGPACK_TYPES[0], etag=etag,
+            headers={"Vary": "Accept, Accept-Encoding"},
+        )
+    body = json.dumps(
+        arr, ensure_ascii=False, separators=(",", ":"), default=_json_default
+    ).encode("utf-8")
+    return bytes_response(
+        request, body, "application/json", etag=etag,
+        headers={"Vary": "Accept, Accept-Encoding"},
+    )
 
 
 # ---------- routing ----------
@@ -124,6 +653,72 @@ def root():
     return {"status": "ok", "hint": "put public/index.html"}
 
 
+# 저장된 이미지: 이름이 uuid 라 내용이 바뀌지 않음 → 장기 캐시 + ETag + Range
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+
+def _parse_range(header: str, size: int):
+    """'bytes=start-end' 단일 구간만 지원 → (start, end) 또는 None(무시) / ValueError(416)"""
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    if first == "":
+        n = int(last)
+        if n <= 0:
+            raise ValueError
+        start, end = max(size - n, 0), size - 1
+    else:
+        start = int(first)
+        end = int(last) if last else size - 1
+    end = min(end, size - 1)
+    if start > end or start >= size:
+        raise ValueError
+    return start, end
+
+
+@app.api_route("/storage/{name}", methods=["GET", "HEAD"])
+def get_stored_image(name: str, request: Request):
+    if name != Path(name).name or name.startswith("."):
+        raise HTTPException(404, "not found")
+    path = STORAGE / name
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        raise HTTPException(404, "not found")
+
+    etag = f'"{Path(name).stem}-{st.st_size:x}"'
+    headers = {
+        "Cache-Control": IMMUTABLE_CACHE,
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    rng = request.headers.get("range")
+    if rng and _etag_matches(request.headers.get("if-range") or etag, etag):
+        try:
+            span = _parse_range(rng, st.st_size)
+        except ValueError:
+            return Response(
+                status_code=416, headers={"Content-Range": f"bytes */{st.st_size}"}
+            )
+        if span is not None:
+            start, end = span
+            with path.open("rb") as f:
+                f.seek(start)
+                data = f.read(end - start + 1) if request.method == "GET" else b""
+            headers["Content-Range"] = f"bytes {start}-{end}/{st.st_size}"
+            headers["Content-Length"] = str(end - start + 1)
+            media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            return Response(
+                content=data, status_code=206, media_type=media_type, headers=headers
+            )
+
+    return FileResponse(path, headers=headers)
+
+
 # 업로드: 단일
 @app.post("/api/images")
 def upload_image(file: UploadFile = File(...), project: str = Form("default")):
@@ -142,6 +737,7 @@ def upload_image(file: UploadFile = File(...), project: str = Form("default")):
     }
     write_json(meta_path(image_id), info)
     write_json(ann_path(image_id), [])
+    record_changes(project, [(image_id, None, _ann_summary([]))])
     return info
 
 
@@ -179,12 +775,16 @@ async def upload_images_batch(
         write_json(ann_path(image_id), [])
         saved.append(info)
 
+    # 프로젝트 잠금은 다른 워커와 경합할 수 있음 → 이벤트 루프 밖에서
+    await run_in_threadpool(
+        record_changes, project, [(it["id"], None, _ann_summary([])) for it in saved]
+    )
     return {"count": len(saved), "items": saved}
 
 
 # 이미지 목록
 @app.get("/api/images")
-def list_images(project: str = "default"):
+def list_images(project: str = "default", request: Request = None):
     items = []
     for p in META.glob("*.json"):
         info = read_json(p, {})
@@ -200,7 +800,7 @@ def list_images(project: str = "default"):
         key=lambda x: os.path.getmtime(meta_path(x["id"])),
         reverse=True,
     )
-    return items
+    return json_response(request, items)
 
 @app.delete("/api/images/{image_id}")
 def delete_image(image_id: str):
@@ -211,138 +811,582 @@ def delete_image(image_id: str):
     - 어노테이션(annotations)
     모두 삭제
     """
-    info = read_json(meta_path(image_id), None)
-    if not info:
+    changes: Dict[str, list] = {}
+    if not _remove_image(image_id, changes):
         raise HTTPException(404, "image not found")
+    record_all(changes)
+    return {"ok": True}
 
-    # 이미지 파일 삭제
-    url = info.get("url")
-    if url:
-        name = url.split("/")[-1]
-        img_path = STORAGE / name
-        if img_path.exists():
-            img_path.unlink()
-
-    # 메타 / 어노테이션 파일 삭제
-    mpath = meta_path(image_id)
-    apath = ann_path(image_id)
-    if mpath.exists():
-        mpath.unlink()
-    if apath.exists():
-        apath.unlink()
 
-    return {"ok": True}
+def _remove_image(image_id: str, changes: dict) -> bool:
+    """이미지 1장의 storage / metadata / annotations 파일 삭제. 이미지가 없으면 False"""
+    with ann_lock(image_id):
+        info = read_json(meta_path(image_id), None)
+        if not info:
+            return False
+
+        # 이미지 파일 삭제
+        url = info.get("url")
+        if url:
+            name = url.split("/")[-1]
+            img_path = STORAGE / name
+            img_path.unlink(missing_ok=True)
+
+        # 메타 / 어노테이션 파일 삭제 (다른 워커가 먼저 지웠어도 오류 없음)
+        old, _ = read_ann_with_etag(image_id)
+        meta_path(image_id).unlink(missing_ok=True)
+        ann_path(image_id).unlink(missing_ok=True)
+    if info.get("project") is not None:
+        changes.setdefault(info["project"], []).append(
+            (image_id, _ann_summary(old), None)
+        )
+    return True
+
 
 # 어노테이션 조회
 @app.get("/api/annotations", response_model=List[AnnOut])
-def get_annotations(image_id: str):
-    arr = read_json(ann_path(image_id), [])
+def get_annotations(image_id: str, request: Request = None):
+    # ETag: 저장 시 If-Match 로 돌려보내면 그 사이 다른 저장이 있었는지 검사,
+    #       재조회 시 If-None-Match 로 보내면 변경 없을 때 304
+    #       Accept: application/msgpack 이면 바이너리 응답
+    arr, etag = read_ann_with_etag(image_id)
     out = []
     for a in arr:
         if "id" not in a or not a["id"]:
             a["id"] = uuid.uuid4().hex
         out.append(a)
-    return out
+    return ann_response(request, out, etag)
 
 
 # 어노테이션 저장
-@app.post("/api/annotations", response_model=List[AnnOut])
-def save_annotations(payload: List[AnnIn]):
-    if not payload:
-        raise HTTPException(400, "empty payload")
-    image_id = payload[0].image_id
+def _prepare_anns(items: list) -> list:
     out = []
-    for a in payload:
-        d = a.model_dump()
+    for d in items:
         d["id"] = d.get("id") or uuid.uuid4().hex
+        # 사용자가 저장한 시점에 모델 제안은 검수 완료된 라벨로 확정
+        if d.get("attrs") and d["attrs"].get("suggested"):
+            d["attrs"] = {k: v for k, v in d["attrs"].items() if k != "suggested"}
         out.append(d)
-    write_json(ann_path(image_id), out)
     return out
 
 
+def store_annotations(out: list, if_match: Optional[str] = None) -> str:
+    """
+    If-Match 헤더(조회 때 받은 ETag)가 있으면 compare-and-swap:
+    그 사이 다른 사용자/워커가 저장했다면 412 로 거부 (덮어쓰기 방지)
+    """
+    if not out:
+        raise HTTPException(400, "empty payload")
+    image_id = out[0]["image_id"]
+    with ann_lock(image_id):
+        if if_match:
+            _, cur = read_ann_with_etag(image_id)
+            # 압축 응답에서 받은 약한 ETag(W/"...") 도 같은 버전으로 취급
+            if _strip_weak(if_match.strip()) not in ("*", cur):
+                raise HTTPException(412, "annotations were modified by another request")
+        return write_ann(image_id, out)
+
+
+def _locked_write_ann(image_id: str, arr: list) -> str:
+    with ann_lock(image_id):
+        return write_ann(image_id, arr)
+
+
+@app.post(
+    "/api/annotations",
+    response_model=List[AnnOut],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": AnnIn.model_json_schema()}
+                },
+                "application/msgpack": {"schema": {"type": "string", "format": "binary"}},
+            },
+        }
+    },
+)
+async def post_annotations(
+    request: Request,
+    if_match: Annotated[Optional[str], Header()] = None,
+):
+    """
+    본문: JSON (AnnIn 리스트) 또는 Content-Type: application/msgpack (points = float32 바이트)
+    응답 형식은 Accept 로 선택
+    """
+    body = await request.body()
+    if _is_msgpack(request):
+        if msgpack is None:
+            raise HTTPException(415, "msgpack is not installed on the server; send JSON")
+        items = _unpack_anns(body)
+    else:
+        try:
+            items = [a.model_dump() for a in _ann_list.validate_json(body)]
+        except ValidationError as e:
+            raise RequestValidationError(e.errors(include_url=False))
+    out = _prepare_anns(items)
+    # 파일 잠금 / 쓰기는 이벤트 루프를 막지 않도록 스레드에서
+    etag = await run_in_threadpool(store_annotations, out, if_match)
+    return ann_response(request, out, etag)
+
+
 # 어노테이션 단건 삭제
 @app.delete("/api/annotations/{image_id}/{ann_id}")
 def delete_annotation(image_id: str, ann_id: str):
-    arr = read_json(ann_path(image_id), [])
-    new_arr = [a for a in arr if a.get("id") != ann_id]
-    if len(arr) == len(new_arr):
-        raise HTTPException(404, "not found")
-    write_json(ann_path(image_id), new_arr)
+    with ann_lock(image_id):
+        arr = read_json(ann_path(image_id), [])
+        new_arr = [a for a in arr if a.get("id") != ann_id]
+        if len(arr) == len(new_arr):
+            raise HTTPException(404, "not found")
+        write_ann(image_id, new_arr)
     return {"ok": True}
 
 
-# -------- Export: 프로젝트 Zip --------
+# -------- 라벨 통계 / 라벨로 이미지 조회 --------
+def _project_state(project: str) -> dict:
+    state = read_json(project_path(project), None)
+    if not _stats_ready(state):
+        with file_lock(f"proj:{project}"):
+            state = read_json(project_path(project), {"project": project})
+            if not _stats_ready(state):
+                state.setdefault("revision", 0)
+                _rebuild_project_state(project, state)
+                write_json(project_path(project), state)
+    return state
+
+
+@app.get("/api/stats")
+def project_stats(project: str = Query("default"), request: Request = None):
+    """
+    프로젝트 집계 (파일 1개만 읽음):
+    이미지 수, 미라벨 이미지 수, 라벨별/타입별 어노테이션 수, 검수 전 모델 제안 수
+    """
+    state = _project_state(project)
+    out = {"project": project, "revision": state.get("revision", 0), **state["stats"]}
+    return json_response(request, out)
+
+
+@app.post("/api/stats/rebuild")
+def rebuild_stats(project: str = Query("default")):
+    """API 를 거치지 않고 파일을 직접 바꿨을 때 전체 스캔으로 다시 집계"""
+    with file_lock(f"proj:{project}"):
+        state = read_json(project_path(project), {"project": project})
+        state["revision"] = int(state.get("revision", 0)) + 1
+        state["updated"] = time.time()
+        _rebuild_project_state(project, state)
+        write_json(project_path(project), state)
+    return {"project": project, "revision": state["revision"], **state["stats"]}
+
+
+@app.get("/api/images/query")
+def query_images(
+    project: str = Query("default"),
+    label: List[str] = Query(None),
+    unlabeled: bool = Query(False),
+    request: Request = None,
+):
+    """
+    라벨로 이미지 필터링 (label 을 여러 개 주면 모두 포함한 이미지)
+    - ?label=burr&label=hole
+    - ?unlabeled=true  확정 라벨이 하나도 없는 이미지
+    항목마다 count = 해당 라벨 개수 (label 여러 개면 합)
+    """
+    _project_state(project)  # 인덱스가 없으면 먼저 생성
+    if unlabeled:
+        hits = _read_index(project, None)
+    elif label:
+        hits = _read_index(project, label[0])
+        for lbl in label[1:]:
+            idx = _read_index(project, lbl)
+            hits = {iid: n + idx[iid] for iid, n in hits.items() if iid in idx}
+    else:
+        raise HTTPException(400, "label or unlabeled=true is required")
+
+    items = []
+    for iid, n in hits.items():
+        info = read_json(meta_path(iid), None)
+        if not info:
+            continue
+        items.append(
+            {
+                "id": info["id"],
+                "filename": info["filename"],
+                "url": info["url"],
+                "count": n,
+            }
+        )
+    items.sort(key=lambda x: (-x["count"], x["filename"] or ""))
+    return json_response(request, items)
+
+
+# -------- Export: 프로젝트 Zip (리비전 캐시 + 증분 재패킹) --------
 def _collect_project_items(project: str):
+    """export 대상 (meta, 이미지 경로, 어노테이션 경로). 어노테이션 내용은 바뀐 것만 나중에 읽음"""
     items = []
     for p in META.glob("*.json"):
         meta = read_json(p, None)
         if not meta or meta.get("project") != project:
             continue
-        iid = meta["id"]
-        url = meta["url"]  # /storage/<name>
-        name = url.split("/")[-1]
-        img_path = STORAGE / name
-        ann = read_json(ann_path(iid), [])
-        items.append(
+        name = meta["url"].split("/")[-1]  # /storage/<name>
+        items.append((meta, STORAGE / name, ann_path(meta["id"])))
+    return items
+
+
+# 이미 압축된 포맷은 다시 deflate 해도 거의 안 줄어듦 → 그대로 저장
+_STORED_EXTS = {".jpg", ".jpeg", ".png", ".webp", ".gif"}
+
+
+def _cache_file(project: str, kind: str, suffix: str) -> Path:
+    return EXPORT_CACHE / f"{quote(project, safe='')}.{kind}{suffix}"
+
+
+def _content_key(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()[:16]
+
+
+def _file_key(path: Path) -> Optional[str]:
+    # 저장 이미지는 uuid 이름이라 내용이 바뀌지 않음 → 이름 + 크기면 충분
+    try:
+        return f"{path.name}:{path.stat().st_size}"
+    except FileNotFoundError:
+        return None
+
+
+def _ann_key(path: Path) -> str:
+    # 어노테이션은 항상 새 파일로 교체(rename)되므로 크기 + mtime 으로 변경 감지
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return "none"
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def _read_ann_bytes(path: Path) -> bytes:
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        return b"[]"
+
+
+def _copy_zip_entry_raw(src: zipfile.ZipFile, info: zipfile.ZipInfo, dst: zipfile.ZipFile):
+    """압축을 풀지 않고 압축된 데이터를 그대로 복사 (이전 export 의 변경 없는 항목 재사용)"""
+    src.fp.seek(info.header_offset)
+    fh = struct.unpack(zipfile.structFileHeader, src.fp.read(zipfile.sizeFileHeader))
+    # fh[10]: 파일명 길이, fh[11]: extra 필드 길이
+    src.fp.seek(fh[10] + fh[11], os.SEEK_CUR)
+    data = src.fp.read(info.compress_size)
+
+    zi = copy.copy(info)
+    zi.flag_bits &= ~0x08  # 크기/CRC 를 로컬 헤더에 바로 기록 (data descriptor 없음)
+    zi.header_offset = dst.fp.tell()
+    dst.fp.write(zi.FileHeader())
+    dst.fp.write(data)
+    dst.filelist.append(zi)
+    dst.NameToInfo[zi.filename] = zi
+    dst.start_dir = dst.fp.tell()
+
+
+def _write_zip_entries(tmp: str, entries: list, old_zf: Optional[zipfile.ZipFile], old_keys: dict):
+    """entries 를 tmp 에 기록 → (keys, 재사용한 arcname 목록). old_zf 가 있으면 key 가 같은 항목은 압축 데이터 복사"""
+    keys = {}
+    reused = []
+    with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for arc, key, src in entries:
+            if key is None:
+                continue
+            info = None
+            if old_zf is not None and old_keys.get(arc) == key:
+                info = old_zf.NameToInfo.get(arc)
+            if info is not None:
+                _copy_zip_entry_raw(old_zf, info, zf)
+                reused.append(arc)
+            elif callable(src):
+                zf.writestr(arc, src())
+            elif isinstance(src, (bytes, bytearray)):
+                zf.writestr(arc, src)
+            else:
+                ctype = (
+                    zipfile.ZIP_STORED
+                    if Path(src).suffix.lower() in _STORED_EXTS
+                    else zipfile.ZIP_DEFLATED
+                )
+                try:
+                    zf.write(src, arc, compress_type=ctype)
+                except FileNotFoundError:  # 그 사이 삭제된 이미지
+                    continue
+            keys[arc] = key
+    return keys, reused
+
+
+def _zip_ok(path: str, reused: list) -> bool:
+    """
+    raw 복사 결과를 공개 API 로 다시 읽어서 검사: 중앙 디렉터리 + 첫/마지막 복사 항목의 로컬 헤더와 CRC.
+    zipfile 내부가 바뀌어 복사가 틀어지면 모든 항목에 똑같이 나타나므로 표본으로 충분
+    (전체 testzip 은 항목 수에 비례해서 느려져 증분 export 이점이 사라짐)
+    """
+    try:
+        with zipfile.ZipFile(path) as zf:
+            for arc in {reused[0], reused[-1]}:
+                with zf.open(arc) as f:  # 로컬 헤더의 파일명/플래그를 중앙 디렉터리와 대조
+                    while f.read(1 << 20):  # 끝까지 읽으면 CRC 검사
+                        pass
+        return True
+    except (OSError, KeyError, zipfile.BadZipFile, zlib.error, EOFError):
+        return False
+
+
+def _build_cached_zip(project: str, kind: str, rev: int, entries: list, extra: Optional[dict] = None) -> Path:
+    """
+    entries: [(arcname, key, source)]  source = 파일 경로(Path), bytes, 또는 bytes 를 만드는 함수
+    이전 캐시 ZIP 에 같은 arcname / 같은 key 항목이 있으면 압축 데이터를 그대로 복사하고,
+    바뀐 항목만 새로 압축 → 큰 프로젝트에서 라벨 몇 개만 고쳤을 때 재export 가 빠름.
+    복사는 zipfile 내부 구조에 의존하므로 결과를 다시 읽어서 검사(_zip_ok), 틀어졌으면 전체를 새로 압축
+    """
+    zpath = _cache_file(project, kind, ".zip")
+    ipath = _cache_file(project, kind, ".zip.json")
+    old_keys = read_json(ipath, {}).get("keys", {}) if zpath.exists() else {}
+
+    fd, tmp = tempfile.mkstemp(dir=EXPORT_CACHE, prefix=zpath.name + ".", suffix=".tmp")
+    os.close(fd)
+    old_zf = None
+    try:
+        if old_keys:
+            try:
+                old_zf = zipfile.ZipFile(zpath)
+            except (OSError, zipfile.BadZipFile):
+                old_zf = None
+        try:
+            keys, reused = _write_zip_entries(tmp, entries, old_zf, old_keys)
+        finally:
+            if old_zf is not None:
+                old_zf.close()
+        if reused and not _zip_ok(tmp, reused):
+            print(f"[WARN] export {project}/{kind}: reused entries failed verification, rebuilding")
+            keys, reused = _write_zip_entries(tmp, entries, None, {})
+        _replace(tmp, zpath)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+    index = {"revision": rev, "keys": keys, "reused": len(reused), "built": time.time()}
+    index.update(extra or {})
+    write_json(ipath, index)
+    return zpath
+
+
+def _cached_export(project: str, kind: str, build):
+    """
+    리비전이 그대로면 캐시된 ZIP 을, 아니면 build(rev, index) 로 다시 생성해서 연 파일 객체 반환.
+    잠금 안에서 열어둠 → 응답을 보내는 중에 다른 워커가 재생성 / 용량 정리로 지워도 끝까지 읽을 수 있음
+    (API 를 거치지 않고 파일을 직접 바꾼 경우는 감지 못 함 → 리비전이 바뀔 때 반영)
+    """
+    rev = project_revision(project)
+    zpath = _cache_file(project, kind, ".zip")
+    ipath = _cache_file(project, kind, ".zip.json")
+    # 같은 프로젝트 export 를 여러 워커가 동시에 만들지 않도록 잠금
+    with file_lock(f"export:{project}:{kind}"):
+        index = read_json(ipath, {}) if zpath.exists() else {}
+        if index.get("revision") != rev:
+            zpath = build(rev, index)
+        try:
+            f = zpath.open("rb")
+        except FileNotFoundError:
+            # 확인 직후 다른 워커의 용량 정리로 삭제됨 → 처음부터 다시 생성
+            zpath = build(rev, {})
+            f = zpath.open("rb")
+        try:
+            os.utime(zpath)  # 사용 시각 갱신 → 오래 안 쓴 캐시부터 삭제
+        except FileNotFoundError:
+            pass
+    _evict_export_cache(keep=zpath)
+    return f
+
+
+def _iter_file(f, chunk: int = 1 << 20):
+    try:
+        while True:
+            data = f.read(chunk)
+            if not data:
+                break
+            yield data
+    finally:
+        f.close()
+
+
+def _zip_response(f, filename: str) -> StreamingResponse:
+    """열어둔 ZIP 파일을 그대로 스트리밍 (FileResponse 는 보낼 때 경로로 다시 열어서 그 사이 삭제되면 실패)"""
+    quoted = quote(filename)
+    if quoted != filename:
+        disposition = f"attachment; filename*=utf-8''{quoted}"
+    else:
+        disposition = f'attachment; filename="{filename}"'
+    headers = {
+        "Content-Disposition": disposition,
+        "Content-Length": str(os.fstat(f.fileno()).st_size),
+    }
+    return StreamingResponse(_iter_file(f), media_type="application/zip", headers=headers)
+
+
+def _evict_export_cache(keep: Optional[Path] = None):
+    """
+    - 캐시 폴더 총 크기가 EXPORT_CACHE_MAX_BYTES 를 넘으면 오래 안 쓴 export 부터 삭제
+    - 중단된 빌드의 임시 파일 정리
+    """
+    now = time.time()
+    files = []
+    for p in EXPORT_CACHE.iterdir():
+        try:
+            st = p.stat()
+            if p.suffix == ".tmp":
+                if now - st.st_mtime > EXPORT_STALE_SEC:
+                    p.unlink()
+                continue
+        except FileNotFoundError:
+            continue
+        if p.name.endswith(".zip.json"):
+            continue  # 인덱스는 ZIP 과 함께 삭제
+        files.append((st.st_mtime, st.st_size, p))
+
+    total = sum(size for _, size, _ in files)
+    for _, size, p in sorted(files):
+        if total <= EXPORT_CACHE_MAX_BYTES:
+            break
+        if p == keep:
+            continue
+        try:
+            p.unlink(missing_ok=True)
+        except PermissionError:
+            continue  # Windows: 다른 요청이 아직 보내는 중 → 다음 정리 때 삭제
+        Path(str(p) + ".json").unlink(missing_ok=True)
+        total -= size
+
+
+
+def _cleanup_legacy_exports():
+    """
+    캐시 도입 전 export 는 시스템 temp 에 <project>_export_<YYYYmmdd_HHMMSS>.zip 을 남김.
+    공용 temp 라 다른 프로그램 파일을 건드리지 않도록 알려진 프로젝트 이름과 정확히 같은 형식만 삭제 (시작 시 1회)
+    """
+    projects = {"default"} | {unquote(p.stem) for p in PROJECTS.glob("*.json")}
+    now = time.time()
+    for project in projects:
+        pattern = re.compile(re.escape(project) + r"_export_\d{8}_\d{6}\.zip")
+        for p in Path(tempfile.gettempdir()).glob(f"{glob.escape(project)}_export_*.zip"):
+            if not pattern.fullmatch(p.name):
+                continue
+            try:
+                if now - p.stat().st_mtime > EXPORT_STALE_SEC:
+                    p.unlink()
+            except OSError:
+                pass
+
+
+_cleanup_legacy_exports()
+
+
+def _build_project_zip(project: str, rev: int, index: dict) -> Path:
+    items = _collect_project_items(project)
+    if not items:
+        raise HTTPException(404, "no items for project")
+
+    entries = []
+    manifest = {"project": project, "count": len(items), "items": []}
+    for meta, img, ann in items:
+        img_rel = f"images/{img.name}"
+        ann_rel = f"annotations/{ann.name}"
+
+        entries.append((img_rel, _file_key(img), img))
+        entries.append((ann_rel, _ann_key(ann), lambda ann=ann: _read_ann_bytes(ann)))
+
+        manifest["items"].append(
             {
-                "image_id": iid,
+                "image_id": meta["id"],
                 "filename": meta.get("filename"),
-                "image_file": str(img_path),
-                "annotation_file": str(ann_path(iid)),
-                "annotation": ann,
+                "image_path": img_rel,
+                "annotation_path": ann_rel,
             }
         )
-    return items
+
+    man_bytes = json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8")
+    entries.append(("manifest.json", _content_key(man_bytes), man_bytes))
+    return _build_cached_zip(project, "export", rev, entries)
 
 
-def _build_zip(project: str, items: list):
+@app.get("/api/export")
+def export_project_zip(project: str = Query("default")):
+    f = _cached_export(project, "export", lambda rev, index: _build_project_zip(project, rev, index))
     ts = time.strftime("%Y%m%d_%H%M%S")
-    zname = f"{project}_export_{ts}.zip"
-    zpath = Path(tempfile.gettempdir()) / zname
+    return _zip_response(f, f"{project}_export_{ts}.zip")
 
-    import zipfile
 
-    with zipfile.ZipFile(zpath, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-        manifest = {"project": project, "count": len(items), "items": []}
-        for it in items:
-            img_rel = f"images/{Path(it['image_file']).name}"
-            ann_rel = f"annotations/{Path(it['annotation_file']).name}"
+# -------- Export: YOLO-Seg 데이터셋 Zip --------
+# convert_json_to_yolo_seg.py / data.yaml 과 같은 클래스 순서
+YOLO_CLASSES = ["hole", "scratch", "burr", "text_error", "cnt_error", "locate_error"]
 
-            if os.path.exists(it["image_file"]):
-                zf.write(it["image_file"], img_rel)
 
-            zf.writestr(
-                ann_rel,
-                json.dumps(it["annotation"], ensure_ascii=False),
-            )
+def _image_size(path: Path):
+    from PIL import Image
 
-            manifest["items"].append(
-                {
-                    "image_id": it["image_id"],
-                    "filename": it["filename"],
-                    "image_path": img_rel,
-                    "annotation_path": ann_rel,
-                }
-            )
+    with Image.open(path) as im:
+        return im.size  # (w, h)
 
-        zf.writestr(
-            "manifest.json",
-            json.dumps(manifest, ensure_ascii=False, indent=2),
-        )
-    return zpath, zname
 
+def _yolo_label_lines(anns: list, w: int, h: int) -> str:
+    lines = []
+    for obj in anns:
+        # polygon 타입 + 정의된 클래스 + 최소 삼각형만 사용 (변환 스크립트와 동일)
+        if obj.get("atype") != "polygon" or obj.get("label") not in YOLO_CLASSES:
+            continue
+        pts = obj.get("points") or []
+        if len(pts) < 3:
+            continue
+        coords = " ".join(f"{x / w:.6f} {y / h:.6f}" for x, y in pts)
+        lines.append(f"{YOLO_CLASSES.index(obj['label'])} {coords}")
+    return "\n".join(lines)
 
-@app.get("/api/export")
-def export_project_zip(project: str = Query("default")):
+
+def _yolo_label_bytes(ann: Path, size: list) -> bytes:
+    anns = json.loads(_read_ann_bytes(ann).decode("utf-8"))
+    return _yolo_label_lines(anns, *size).encode("utf-8")
+
+
+def _build_yolo_zip(project: str, rev: int, index: dict) -> Path:
     items = _collect_project_items(project)
     if not items:
         raise HTTPException(404, "no items for project")
-    zpath, zname = _build_zip(project, items)
-    return FileResponse(
-        zpath,
-        filename=zname,
-        media_type="application/zip",
-    )
+
+    # 이미지 크기는 이전 빌드 인덱스에 저장해 두고 재사용 (매번 이미지 헤더를 열지 않음)
+    old_sizes = index.get("sizes", {})
+    sizes = {}
+    entries = []
+    for _, img, ann in items:
+        key = _file_key(img)
+        if key is None:
+            continue
+        size = old_sizes.get(key) or list(_image_size(img))
+        sizes[key] = size
+        entries.append((f"images/{img.name}", key, img))
+        entries.append(
+            (
+                f"labels/{img.stem}.txt",
+                f"{key}/{_ann_key(ann)}",
+                lambda ann=ann, size=size: _yolo_label_bytes(ann, size),
+            )
+        )
+
+    names = "\n".join(f"  {i}: {n}" for i, n in enumerate(YOLO_CLASSES))
+    yaml = f"path: .\ntrain: images\nval: images\n\nnames:\n{names}\n".encode("utf-8")
+    entries.append(("data.yaml", _content_key(yaml), yaml))
+    return _build_cached_zip(project, "yolo", rev, entries, extra={"sizes": sizes})
+
+
+@app.get("/api/yolo/export")
+def export_yolo_zip(project: str = Query("default")):
+    f = _cached_export(project, "yolo", lambda rev, index: _build_yolo_zip(project, rev, index))
+    ts = time.strftime("%Y%m%d_%H%M%S")
+    return _zip_response(f, f"{project}_yolo_{ts}.zip")
 
 
 # -------- COCO 관련 엔드포인트 --------
@@ -364,8 +1408,8 @@ async def save_annotation(request: Request):
     for obj in annos:
         obj["image_id"] = stem
 
-    with open(anno_file, "w", encoding="utf-8") as f:
-        json.dump(annos, f, ensure_ascii=False, indent=2)
+    # 파일 잠금(flock) / 쓰기 / 통계 갱신은 이벤트 루프를 막지 않도록 스레드에서
+    await run_in_threadpool(_locked_write_ann, stem, annos)
 
     return JSONResponse({"ok": True, "annotation_file": str(anno_file)})
 
@@ -379,7 +1423,7 @@ def save_coco(payload: CocoPayload):
         raise HTTPException(400, "empty payload")
 
     ts = time.strftime("%Y%m%d_%H%M%S")
-    coco_path = ROOT / f"annotations_coco_{ts}.json"
+    coco_path = DATA / f"annotations_coco_{ts}.json"
     _ensure_dir(coco_path)
     write_json(coco_path, payload.model_dump())
 
@@ -423,8 +1467,11 @@ def save_coco(payload: CocoPayload):
             }
         per_image[img_id].append(item)
 
+    changes: Dict[str, list] = {}
     for img_id, items in per_image.items():
-        write_json(ann_path(str(img_id)), items)
+        with ann_lock(str(img_id)):
+            write_ann(str(img_id), items, changes)
+    record_all(changes)
 
     return {
         "ok": True,
@@ -434,8 +1481,7 @@ def save_coco(payload: CocoPayload):
     }
 
 
-@app.get("/api/coco/export")
-def export_coco(project: str = Query("default")):
+def _build_coco(project: str) -> bytes:
     images = []
     for p in META.glob("*.json"):
         meta = read_json(p, None)
@@ -458,8 +1504,9 @@ def export_coco(project: str = Query("default")):
     annotations = []
     label_set = set()
     ann_id = 1
-    for p in ANNS.glob("*.json"):
-        arr = read_json(p, [])
+    # 이 프로젝트 이미지의 어노테이션만 포함
+    for im in images:
+        arr = read_json(ann_path(im["id"]), [])
         for a in arr:
             label_set.add(a.get("label", "object"))
             image_id = a.get("image_id")
@@ -483,7 +1530,7 @@ def export_coco(project: str = Query("default")):
                         "area": _poly_area(flat),
                         "bbox": bbox or [0, 0, 0, 0],
                         "iscrowd": int(
-                            a.get("attrs", {}).get("iscrowd", 0)
+                            (a.get("attrs") or {}).get("iscrowd", 0)
                         ),
                     }
                 )
@@ -500,7 +1547,7 @@ def export_coco(project: str = Query("default")):
                         "area": float(w) * float(h),
                         "bbox": [float(x) for x in bbox],
                         "iscrowd": int(
-                            a.get("attrs", {}).get("iscrowd", 0)
+                            (a.get("attrs") or {}).get("iscrowd", 0)
                         ),
                     }
                 )
@@ -526,4 +1573,550 @@ def export_coco(project: str = Query("default")):
         "images": images,
         "annotations": annotations,
     }
-    return JSONResponse(coco)
+    return json.dumps(coco, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+@app.get("/api/coco/export")
+def export_coco(project: str = Query("default"), request: Request = None):
+    # 리비전별로 본문을 캐시 → 변경 없는 프로젝트는 파일만 읽어서 응답 (재방문은 304)
+    rev = project_revision(project)
+    cpath = _cache_file(project, "coco", f".r{rev}.json")
+    # 새 리비전을 만드는 워커가 예전 파일을 지우는 것과 겹치지 않도록 같은 잠금 안에서 읽기
+    with file_lock(f"export:{project}:coco"):
+        try:
+            body = cpath.read_bytes()
+        except FileNotFoundError:  # 캐시 없음, 또는 용량 정리로 방금 삭제됨
+            body = None
+        if body is None:
+            body = _build_coco(project)
+            for old in EXPORT_CACHE.glob(_cache_file(project, "coco", ".r*.json").name):
+                old.unlink(missing_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=EXPORT_CACHE, prefix=cpath.name + ".", suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(body)
+            _replace(tmp, cpath)
+            _evict_export_cache(keep=cpath)
+        else:
+            try:
+                os.utime(cpath)
+            except FileNotFoundError:
+                pass
+    etag = f'"coco-r{rev}-{len(body):x}"'
+    return bytes_response(request, body, "application/json", etag=etag)
+
+
+# -------- 백그라운드 작업(job) 공용 --------
+# 상태는 JOBS/<job_id>.json 에 저장 → 서버 재시작 후에도 조회/재개 가능
+_job_threads: Dict[str, threading.Thread] = {}
+_job_lock = threading.Lock()
+# running 상태인데 이 시간(초) 동안 갱신이 없으면 죽은 작업으로 보고 재개 허용
+JOB_STALE_SEC = 300
+
+
+def job_path(job_id: str) -> Path:
+    return JOBS / f"{job_id}.json"
+
+
+def _new_job(kind: str, pending: list, params: dict) -> dict:
+    job = {
+        "id": uuid.uuid4().hex,
+        "kind": kind,
+        "status": "queued",
+        "total": len(pending),
+        "done": 0,
+        "failed": [],
+        "pending": pending,
+        "params": params,
+        "error": None,
+        "created": time.time(),
+        "updated": time.time(),
+    }
+    write_json(job_path(job["id"]), job)
+    return job
+
+
+def _public_job(job: dict) -> dict:
+    out = {k: v for k, v in job.items() if k != "pending"}
+    out["remaining"] = len(job.get("pending", []))
+    return out
+
+
+def _start_job(job: dict, runner):
+    """runner(job) 는 job["pending"] 을 소비하면서 중간 상태를 저장해야 함"""
+
+    def _run():
+        job["status"] = "running"
+        job["updated"] = time.time()
+        write_json(job_path(job["id"]), job)
+        try:
+            runner(job)
+            job["status"] = "done"
+        except Exception as e:  # noqa: BLE001 - 작업 실패는 상태로 남김
+            job["status"] = "failed"
+            job["error"] = repr(e)
+        job["updated"] = time.time()
+        write_json(job_path(job["id"]), job)
+        with _job_lock:
+            _job_threads.pop(job["id"], None)
+
+    t = threading.Thread(target=_run, name=f"job-{job['id']}", daemon=True)
+    with _job_lock:
+        _job_threads[job["id"]] = t
+    t.start()
+
+
+_JOB_RUNNERS: Dict[str, Any] = {}
+
+
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: str):
+    job = read_json(job_path(job_id), None)
+    if not job:
+        raise HTTPException(404, "job not found")
+    return _public_job(job)
+
+
+@app.post("/api/jobs/{job_id}/resume")
+def resume_job(job_id: str):
+    """
+    중단된 작업(서버 재시작, 실패 등)을 남은 pending 부터 이어서 실행
+    """
+    # 여러 워커가 동시에 재개하지 않도록 job 단위 잠금 안에서 상태 확인 + 선점
+    with file_lock(f"job:{job_id}"):
+        job = read_json(job_path(job_id), None)
+        if not job:
+            raise HTTPException(404, "job not found")
+        with _job_lock:
+            alive = job_id in _job_threads and _job_threads[job_id].is_alive()
+        # 다른 워커에서 실행 중인 작업은 배치마다 updated 가 갱신됨
+        recent = time.time() - job.get("updated", 0) < JOB_STALE_SEC
+        if alive or (job["status"] in ("queued", "running") and recent):
+            raise HTTPException(409, "job is already running")
+        if not job.get("pending"):
+            return _public_job(job)
+        runner = _JOB_RUNNERS.get(job["kind"])
+        if runner is None:
+            raise HTTPException(400, f"unknown job kind: {job['kind']}")
+        job["error"] = None
+        job["status"] = "queued"
+        job["updated"] = time.time()
+        write_json(job_path(job_id), job)
+    _start_job(job, runner)
+    return _public_job(job)
+
+
+# -------- 일괄 작업: 삭제 / 프로젝트 이동 --------
+# 한 번에 수천 장 → 백그라운드 작업으로 처리, BULK_CHUNK 장마다 진행 상황 저장 + 통계 반영
+BULK_CHUNK = 200
+
+
+def _move_image(image_id: str, project: str, changes: dict) -> bool:
+    with ann_lock(image_id):
+        info = read_json(meta_path(image_id), None)
+        if not info:
+            return False
+        src = info.get("project")
+        if src == project:
+            return True
+        info["project"] = project
+        write_json(meta_path(image_id), info)
+        summ = _ann_summary(read_ann_with_etag(image_id)[0])
+    if src is not None:
+        changes.setdefault(src, []).append((image_id, summ, None))
+    changes.setdefault(project, []).append((image_id, None, summ))
+    return True
+
+
+def _run_bulk_job(job: dict, op):
+    """op(image_id, changes) -> 성공 여부. 없는 이미지는 failed 에 기록"""
+    while job["pending"]:
+        chunk = job["pending"][:BULK_CHUNK]
+        changes: Dict[str, list] = {}
+        for iid in chunk:
+            if not op(iid, changes):
+                job["failed"].append(iid)
+        record_all(changes)
+
+        job["pending"] = job["pending"][len(chunk):]
+        job["done"] += len(chunk)
+        job["updated"] = time.time()
+        write_json(job_path(job["id"]), job)
+
+
+def _run_delete_job(job: dict):
+    _run_bulk_job(job, _remove_image)
+
+
+def _run_move_job(job: dict):
+    dst = job["params"]["project"]
+    _run_bulk_job(job, lambda iid, changes: _move_image(iid, dst, changes))
+
+
+_JOB_RUNNERS["delete"] = _run_delete_job
+_JOB_RUNNERS["move"] = _run_move_job
+
+
+@app.post("/api/images/delete")
+def delete_images(payload: ImageIds):
+    """
+    여러 이미지 일괄 삭제 (백그라운드 작업)
+    - 진행 상황: GET /api/jobs/{job_id}, 없는 id 는 failed 에 기록
+    """
+    if not payload.ids:
+        raise HTTPException(400, "empty ids")
+    job = _new_job("delete", list(dict.fromkeys(payload.ids)), {})
+    _start_job(job, _run_delete_job)
+    return _public_job(job)
+
+
+@app.post("/api/images/move")
+def move_images(payload: MoveImages):
+    """여러 이미지를 다른 프로젝트로 이동 (백그라운드 작업, 파일은 그대로 두고 메타만 변경)"""
+    if not payload.ids:
+        raise HTTPException(400, "empty ids")
+    job = _new_job("move", list(dict.fromkeys(payload.ids)), {"project": payload.project})
+    _start_job(job, _run_move_job)
+    return _public_job(job)
+
+
+# -------- 정리(GC): storage / metadata / annotations 불일치 정리 --------
+# 업로드 도중(이미지 → 메타 → 어노테이션 순서로 기록) 파일을 지우지 않도록 이 시간(초)보다 오래된 것만 정리
+GC_GRACE_SEC = 600
+GC_REPORT_ITEMS = 50
+# 업로드 이미지 id (uuid4().hex). 메타 없이 이 형식의 어노테이션만 남았다면 삭제된 이미지의 잔재
+_UPLOAD_ID = re.compile(r"[0-9a-f]{32}")
+
+
+def _scan_files(d: Path) -> dict:
+    with os.scandir(d) as it:
+        return {e.name: e for e in it if e.is_file()}
+
+
+@app.post("/api/gc")
+def collect_garbage(dry_run: bool = Query(False)):
+    """
+    폴더마다 목록을 한 번만 읽고 서로 대조:
+    - images     : 어떤 메타에서도 참조하지 않는 storage 파일
+    - metadata   : 이미지 파일이 없어진 메타 (+ 그 어노테이션)
+    - annotations: 메타가 없는 업로드 이미지(uuid 이름)의 어노테이션
+                   /save(COCO id), /save_annotation(파일명) 이 만든 어노테이션은 원래 메타가 없으므로
+                   삭제하지 않고 orphans_kept 로만 보고. dataset/images 에 같은 이름이 있으면 YOLO 변환 입력이라 유지
+    - tmp        : 중단된 쓰기가 남긴 *.tmp
+    dry_run=true 면 삭제하지 않고 보고만 함
+    """
+    t0 = time.time()
+    report = {
+        k: {"count": 0, "bytes": 0, "items": []}
+        for k in ("images", "metadata", "annotations", "tmp")
+    }
+
+    def old_enough(entry) -> bool:
+        return t0 - entry.stat().st_mtime > GC_GRACE_SEC
+
+    def reclaim(kind: str, path: Path, size: int):
+        r = report[kind]
+        r["count"] += 1
+        r["bytes"] += size
+        if len(r["items"]) < GC_REPORT_ITEMS:
+            r["items"].append(path.name)
+        if not dry_run:
+            path.unlink(missing_ok=True)
+
+    storage = _scan_files(STORAGE)
+    metas = _scan_files(META)
+    anns = _scan_files(ANNS)
+
+    # 메타 ↔ 이미지 파일
+    referenced = set()
+    live_ids = set()
+    changes: Dict[str, list] = {}
+    for name in metas:
+        if not name.endswith(".json"):
+            continue
+        iid = name[:-5]
+        try:
+            meta = read_json(META / name, None)
+        except (OSError, ValueError):
+            continue
+        if not meta or "url" not in meta:
+            continue
+        img_name = meta["url"].split("/")[-1]
+        if img_name in storage:
+            referenced.add(img_name)
+            live_ids.add(iid)
+            continue
+        if not old_enough(metas[name]):
+            live_ids.add(iid)
+            continue
+        with ann_lock(iid):
+            # 잠금 사이에 다른 요청이 지웠거나 이미지를 다시 올렸을 수 있음 → 재확인
+            if not meta_path(iid).exists() or (STORAGE / img_name).exists():
+                continue
+            arr = read_json(ann_path(iid), [])
+            size = metas[name].stat().st_size
+            if iid + ".json" in anns:
+                size += anns[iid + ".json"].stat().st_size
+                if not dry_run:
+                    ann_path(iid).unlink(missing_ok=True)
+            reclaim("metadata", meta_path(iid), size)
+        if meta.get("project") is not None:
+            changes.setdefault(meta["project"], []).append((iid, _ann_summary(arr), None))
+
+    # 참조 없는 이미지 파일 (storage 파일명 = <image_id><ext>)
+    for name, entry in storage.items():
+        if name in referenced or name.startswith(".") or not old_enough(entry):
+            continue
+        stem = Path(name).stem
+        with ann_lock(stem):
+            if meta_path(stem).exists():
+                continue
+            reclaim("images", STORAGE / name, entry.stat().st_size)
+
+    # 메타 없는 어노테이션
+    dataset_dir = DATA / "dataset" / "images"
+    dataset_stems = (
+        {p.stem for p in dataset_dir.iterdir()} if dataset_dir.is_dir() else set()
+    )
+    kept = 0
+    orphans = {"count": 0, "items": []}
+    for name, entry in anns.items():
+        if not name.endswith(".json"):
+            continue
+        iid = name[:-5]
+        if iid in live_ids or not old_enough(entry):
+            continue
+        if iid in dataset_stems:
+            kept += 1
+            continue
+        if not _UPLOAD_ID.fullmatch(iid):
+            orphans["count"] += 1
+            if len(orphans["items"]) < GC_REPORT_ITEMS:
+                orphans["items"].append(name)
+            continue
+        with ann_lock(iid):
+            if meta_path(iid).exists():
+                continue
+            reclaim("annotations", ANNS / name, entry.stat().st_size)
+
+    # 중단된 원자적 쓰기의 임시 파일
+    for d in (META, ANNS, JOBS, PROJECTS):
+        for p in d.rglob("*.tmp"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            if t0 - st.st_mtime > GC_GRACE_SEC:
+                reclaim("tmp", p, st.st_size)
+
+    if not dry_run:
+        record_all(changes)
+
+    return {
+        "dry_run": dry_run,
+        "reclaimed_bytes": sum(r["bytes"] for r in report.values()),
+        **report,
+        "kept_dataset_annotations": kept,
+        "orphans_kept": orphans,
+        "elapsed_sec": round(time.time() - t0, 3),
+    }
+
+
+# -------- 사전 라벨링 (모델 제안 폴리곤) --------
+_model = None
+_model_lock = threading.Lock()
+
+
+def _get_model():
+    """학습된 세그멘테이션 모델을 한 번만 로드해서 상주시킴"""
+    global _model
+    with _model_lock:
+        if _model is None:
+            try:
+                from ultralytics import YOLO
+            except ImportError:
+                raise HTTPException(503, "ultralytics is not installed")
+            if not MODEL_PATH.exists():
+                raise HTTPException(503, f"model not found: {MODEL_PATH}")
+            _model = YOLO(str(MODEL_PATH))
+        return _model
+
+
+def _image_file(meta: dict) -> Path:
+    return STORAGE / meta["url"].split("/")[-1]
+
+
+def _predict_suggestions(metas: list, conf: float) -> list:
+    """
+    이미지 여러 장을 한 번에 모델에 넣고, 이미지별 제안 어노테이션 리스트 반환
+    """
+    model = _get_model()
+    sources = [str(_image_file(m)) for m in metas]
+    # predictor 는 스레드 안전하지 않으므로 모델 락 안에서 실행
+    with _model_lock:
+        results = model.predict(
+            source=sources, conf=conf, batch=len(sources), verbose=False
+        )
+
+    out = []
+    for meta, r in zip(metas, results):
+        names = r.names
+        cls_ids = r.boxes.cls.cpu().numpy().astype(int) if r.boxes is not None else []
+        scores = r.boxes.conf.cpu().numpy() if r.boxes is not None else []
+        polys = r.masks.xy if r.masks is not None else [None] * len(cls_ids)
+        boxes = r.boxes.xyxy.cpu().numpy() if r.boxes is not None else []
+
+        anns = []
+        for cls_id, score, poly, box in zip(cls_ids, scores, polys, boxes):
+            attrs = {
+                "suggested": True,
+                "source": "prelabel",
+                "score": round(float(score), 4),
+            }
+            if poly is not None and len(poly) >= 3:
+                anns.append(
+                    {
+                        "id": uuid.uuid4().hex,
+                        "image_id": meta["id"],
+                        "atype": "polygon",
+                        "label": names.get(int(cls_id), str(cls_id)),
+                        "bbox": None,
+                        "points": poly.round(2).tolist(),
+                        "text": None,
+                        "attrs": attrs,
+                    }
+                )
+            else:
+                x1, y1, x2, y2 = (float(v) for v in box)
+                anns.append(
+                    {
+                        "id": uuid.uuid4().hex,
+                        "image_id": meta["id"],
+                        "atype": "bbox",
+                        "label": names.get(int(cls_id), str(cls_id)),
+                        "bbox": [x1, y1, x2 - x1, y2 - y1],
+                        "points": None,
+                        "text": None,
+                        "attrs": attrs,
+                    }
+                )
+        out.append(anns)
+    return out
+
+
+def _merge_suggestions(image_id: str, suggestions: list):
+    """이전 제안은 교체하고, 사람이 만든/확정한 라벨은 유지 → (병합 결과, ETag)"""
+    with ann_lock(image_id):
+        arr = read_json(ann_path(image_id), [])
+        keep = [a for a in arr if not (a.get("attrs") or {}).get("suggested")]
+        merged = keep + suggestions
+        etag = write_ann(image_id, merged)
+    return merged, etag
+
+
+def _has_manual_labels(image_id: str) -> bool:
+    arr = read_json(ann_path(image_id), [])
+    return any(not (a.get("attrs") or {}).get("suggested") for a in arr)
+
+
+def _prelabel_batch(job: dict, metas: list, conf: float):
+    """
+    배치 추론 + 병합. 읽을 수 없는 이미지 등으로 배치가 실패하면 1장씩 다시 시도해서
+    문제 이미지만 failed 에 기록 → 작업은 계속 진행 (재개해도 같은 곳에서 멈추지 않음)
+    """
+    try:
+        results = _predict_suggestions(metas, conf)
+    except Exception as e:  # noqa: BLE001 - 이미지 단위 실패로 처리
+        if len(metas) > 1:
+            for meta in metas:
+                _prelabel_batch(job, [meta], conf)
+            return
+        _prelabel_failed(job, metas[0]["id"], e)
+        return
+    for meta, sugg in zip(metas, results):
+        try:
+            _merge_suggestions(meta["id"], sugg)
+        except Exception as e:  # noqa: BLE001
+            _prelabel_failed(job, meta["id"], e)
+
+
+def _prelabel_failed(job: dict, image_id: str, err: Exception):
+    print(f"[WARN] prelabel failed for {image_id}: {err!r}")
+    job["failed"].append(image_id)
+    job.setdefault("errors", {})[image_id] = repr(err)
+
+
+def _run_prelabel_job(job: dict):
+    conf = job["params"]["conf"]
+    batch = max(1, job["params"].get("batch", PRELABEL_BATCH))
+    _get_model()  # 모델이 없으면 이미지별 실패가 아니라 작업 실패 (모델을 넣고 재개)
+    while job["pending"]:
+        chunk_ids = job["pending"][:batch]
+        metas = []
+        for iid in chunk_ids:
+            meta = read_json(meta_path(iid), None)
+            if meta and _image_file(meta).exists():
+                metas.append(meta)
+            else:
+                job["failed"].append(iid)
+
+        if metas:
+            _prelabel_batch(job, metas, conf)
+
+        # 배치 단위로 진행 상황 저장 → 중단되면 여기서부터 재개
+        job["pending"] = job["pending"][len(chunk_ids):]
+        job["done"] += len(chunk_ids)
+        job["updated"] = time.time()
+        write_json(job_path(job["id"]), job)
+
+
+_JOB_RUNNERS["prelabel"] = _run_prelabel_job
+
+
+@app.post("/api/prelabel/{image_id}", response_model=List[AnnOut])
+def prelabel_image(
+    image_id: str, conf: float = Query(0.25), response: Response = None
+):
+    """이미지 1장 즉시 추론 → 제안 폴리곤을 어노테이션에 병합해서 반환"""
+    meta = read_json(meta_path(image_id), None)
+    if not meta:
+        raise HTTPException(404, "image not found")
+    if not _image_file(meta).exists():
+        raise HTTPException(404, "image file missing")
+    sugg = _predict_suggestions([meta], conf)[0]
+    merged, etag = _merge_suggestions(image_id, sugg)
+    if response is not None:
+        response.headers["ETag"] = etag
+    return merged
+
+
+@app.post("/api/prelabel")
+def prelabel_project(
+    project: str = Query("default"),
+    conf: float = Query(0.25),
+    skip_labeled: bool = Query(True),
+    batch: int = Query(PRELABEL_BATCH),
+):
+    """
+    프로젝트 전체를 백그라운드 작업으로 사전 라벨링
+    - 진행 상황: GET /api/jobs/{job_id} (추론에 실패한 이미지는 failed / errors 에 기록하고 계속 진행)
+    - 중단 시 재개: POST /api/jobs/{job_id}/resume
+    """
+    _get_model()  # 모델이 없으면 작업 생성 전에 503
+    pending = []
+    for p in META.glob("*.json"):
+        meta = read_json(p, None)
+        if not meta or meta.get("project") != project:
+            continue
+        if skip_labeled and _has_manual_labels(meta["id"]):
+            continue
+        pending.append(meta["id"])
+    if not pending:
+        raise HTTPException(404, "no images to pre-label")
+
+    job = _new_job(
+        "prelabel",
+        pending,
+        {"project": project, "conf": conf, "batch": batch},
+    )
+    _start_job(job, _run_prelabel_job)
+    return _public_job(job)
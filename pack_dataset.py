@@ -0,0 +1,477 @@
+"""
+학습용 데이터셋 mmap 캐시 (JPEG 디코딩 / 파일 열기를 학습 전에 한 번만)
+- data.yaml 의 train / val 이미지를 미리 디코딩해서 학습 imgsz 로 줄인 뒤
+  고정 크기(imgsz x imgsz x 3) 슬롯에 좌상단 정렬로 저장 → 샤드 파일(np.memmap)
+- 크기 조정은 ultralytics BaseDataset.load_image 와 같은 방식 (긴 변 = imgsz, 비율 유지)
+  → 학습 결과가 캐시 없이 돌릴 때와 같음. letterbox 패딩은 읽을 때 적용
+  보간법은 ultralytics 버전마다 다름 (예전: 축소 시 INTER_AREA, 현재: 항상 INTER_LINEAR)
+  → 패킹할 때 설치된 버전의 규칙을 읽어서 index 에 기록, 학습 시 설치된 버전과 다르면 캐시 사용 안 함
+- 폴리곤 라벨(정규화 좌표)은 split 별 npz 에 같이 저장
+- index.json: 이미지별 원본 경로 / 크기 / mtime, 원본 크기(h0, w0), 줄인 크기(h, w)
+  이미지 파일이 바뀌면 로더가 해당 이미지만 원래 방식(디코딩)으로 읽음
+
+패킹:
+    python pack_dataset.py --data data.yaml --imgsz 640 --out dataset_cache
+
+학습 (ultralytics): 이미지 로딩만 캐시 읽기로 교체, 라벨 / 증강은 그대로
+    from pack_dataset import use_mmap_cache
+    use_mmap_cache("dataset_cache")     # Windows: DataLoader 워커가 메인 모듈을 다시 import
+                                        # 하므로 if __name__ == "__main__" 밖(모듈 최상단)에서 호출
+    YOLO("yolo11n-seg.pt").train(data="data.yaml", imgsz=640, cache=False, workers=4)
+
+직접 만든 학습 루프:
+    ds = MmapDataset("dataset_cache", "train")
+    sample = ds[0]   # img(letterbox, imgsz x imgsz), cls, segments(픽셀 좌표)
+"""
+
+import argparse
+import inspect
+import json
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+INDEX_VERSION = 2
+PAD_VALUE = 114  # ultralytics letterbox 패딩 색
+
+
+# ---------- 경로 ----------
+def _split_dirs(data_yaml: Path) -> dict:
+    """data.yaml → {split: 이미지 폴더}"""
+    import yaml
+
+    with open(data_yaml, "r", encoding="utf-8") as f:
+        cfg = yaml.safe_load(f)
+    base = Path(cfg.get("path") or ".")
+    if not base.is_absolute():
+        base = (data_yaml.parent / base).resolve()
+    out = {}
+    for split in ("train", "val", "test"):
+        rel = cfg.get(split)
+        if not rel:
+            continue
+        if not isinstance(rel, str):  # 폴더 여러 개 / txt 목록 형식은 미지원
+            print(f"[WARN] {split}: only a single image folder is supported ({rel})")
+            continue
+        d = Path(rel)
+        out[split] = d if d.is_absolute() else base / d
+    return out
+
+
+def _img2label(img: Path) -> Path:
+    # ultralytics img2label_paths 와 같은 규칙: .../images/... → .../labels/....txt
+    sa, sb = f"{os.sep}images{os.sep}", f"{os.sep}labels{os.sep}"
+    return Path(sb.join(str(img).rsplit(sa, 1))).with_suffix(".txt")
+
+
+def _norm(path) -> str:
+    return os.path.normcase(os.path.abspath(str(path)))
+
+
+IMG_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp"}
+
+
+# ---------- 라벨 ----------
+def _read_label(path: Path):
+    """YOLO txt → (cls 리스트, (n, 2) 정규화 좌표 리스트). 박스 줄(cx cy w h)은 사각형 폴리곤으로"""
+    cls, segs = [], []
+    if not path.exists():
+        return cls, segs
+    for line in path.read_text(encoding="utf-8").splitlines():
+        vals = line.split()
+        if len(vals) < 5:
+            continue
+        c = int(float(vals[0]))
+        xy = np.asarray(vals[1:], dtype=np.float32)
+        if len(xy) == 4:
+            cx, cy, w, h = xy
+            xy = np.array(
+                [cx - w / 2, cy - h / 2, cx + w / 2, cy - h / 2,
+                 cx + w / 2, cy + h / 2, cx - w / 2, cy + h / 2],
+                dtype=np.float32,
+            )
+        cls.append(c)
+        segs.append(xy[: len(xy) // 2 * 2].reshape(-1, 2))
+    return cls, segs
+
+
+def _pack_labels(all_labels: list) -> dict:
+    """이미지별 (cls, segs) → 평탄화된 배열 (이미지 → 폴리곤 → 점 오프셋)"""
+    img_off = [0]
+    seg_off = [0]
+    seg_cls = []
+    points = []
+    for cls, segs in all_labels:
+        for c, s in zip(cls, segs):
+            seg_cls.append(c)
+            points.append(s)
+            seg_off.append(seg_off[-1] + len(s))
+        img_off.append(len(seg_cls))
+    return {
+        "img_off": np.asarray(img_off, dtype=np.int64),
+        "seg_off": np.asarray(seg_off, dtype=np.int64),
+        "seg_cls": np.asarray(seg_cls, dtype=np.int16),
+        "points": (
+            np.concatenate(points).astype(np.float32)
+            if points else np.zeros((0, 2), dtype=np.float32)
+        ),
+    }
+
+
+# ---------- 이미지 ----------
+def _ultralytics_version():
+    try:
+        import ultralytics
+    except ImportError:
+        return None
+    return getattr(ultralytics, "__version__", None)
+
+
+def _resize_rule():
+    """
+    설치된 ultralytics BaseDataset.load_image 의 보간 규칙
+    - "area"  : 예전 버전. augment 가 아니고 축소할 때 INTER_AREA, 나머지 INTER_LINEAR
+    - "linear": 현재 버전. 항상 INTER_LINEAR
+    ultralytics 가 없으면 "linear", 소스를 읽을 수 없으면 None (버전으로만 비교)
+    """
+    try:
+        from ultralytics.data.base import BaseDataset
+    except ImportError:
+        return "linear"
+    fn = getattr(BaseDataset.load_image, "_orig", BaseDataset.load_image)
+    try:
+        src = inspect.getsource(fn)
+    except (OSError, TypeError):
+        return None
+    return "area" if "INTER_AREA" in src else "linear"
+
+
+def _resize(im: np.ndarray, imgsz: int, augment: bool, rule: str) -> np.ndarray:
+    # ultralytics BaseDataset.load_image(rect_mode=True) 와 동일한 크기 / 보간법
+    h0, w0 = im.shape[:2]
+    r = imgsz / max(h0, w0)
+    if r != 1:
+        w, h = (min(math.ceil(w0 * r), imgsz), min(math.ceil(h0 * r), imgsz))
+        if rule == "area" and not augment and r < 1:
+            interp = cv2.INTER_AREA
+        else:
+            interp = cv2.INTER_LINEAR
+        im = cv2.resize(im, (w, h), interpolation=interp)
+    return im
+
+
+def _signature(img: Path) -> dict:
+    st = img.stat()
+    lbl = _img2label(img)
+    lst = lbl.stat() if lbl.exists() else None
+    return {
+        "file": str(img.resolve()),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "label_mtime_ns": lst.st_mtime_ns if lst else 0,
+    }
+
+
+def pack_split(
+    split: str,
+    img_dir: Path,
+    out: Path,
+    imgsz: int,
+    shard_size: int,
+    workers: int,
+    rule: str,
+    old: dict = None,
+) -> dict:
+    files = sorted(p for p in img_dir.rglob("*") if p.suffix.lower() in IMG_EXTS)
+    items = [_signature(p) for p in files]
+    augment = split == "train"  # ultralytics: 학습 데이터만 augment=True → 보간법이 다름
+
+    # 이미지 / 라벨 / 설정이 그대로면 다시 만들지 않음
+    keys = ("file", "size", "mtime_ns", "label_mtime_ns")
+    if (
+        old
+        and old.get("imgsz") == imgsz
+        and old.get("shard_size") == shard_size
+        and old.get("resize_rule") == rule
+        and [{k: it[k] for k in keys} for it in old["items"]] == items
+        and all((out / s["file"]).exists() for s in old["shards"])
+    ):
+        print(f"[INFO] {split}: up to date ({len(items)} images)")
+        return old
+
+    for p in out.glob(f"{split}_*.u8"):
+        p.unlink()
+
+    shards = []
+    maps = []
+    for k in range(0, len(files), shard_size):
+        count = min(shard_size, len(files) - k)
+        name = f"{split}_{k // shard_size:03d}.u8"
+        shards.append({"file": name, "count": count})
+        maps.append(
+            np.memmap(out / name, dtype=np.uint8, mode="w+", shape=(count, imgsz, imgsz, 3))
+        )
+
+    def _one(i: int):
+        # cv2.imread / resize 는 GIL 을 풀어서 스레드로 병렬 처리됨
+        im = cv2.imread(str(files[i]))
+        if im is None:
+            return i, None
+        h0, w0 = im.shape[:2]
+        im = _resize(im, imgsz, augment, rule)
+        h, w = im.shape[:2]
+        maps[i // shard_size][i % shard_size, :h, :w] = im
+        return i, (h0, w0, h, w)
+
+    t0 = time.perf_counter()
+    bad = 0
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        for i, shape in ex.map(_one, range(len(files))):
+            if shape is None:
+                print(f"[WARN] {split}: cannot read {files[i]}")
+                bad += 1
+                shape = (0, 0, 0, 0)  # 로더가 원래 방식으로 읽음
+            items[i].update(dict(zip(("h0", "w0", "h", "w"), shape)))
+    for m in maps:
+        m.flush()
+    del maps
+
+    labels = _pack_labels([_read_label(_img2label(p)) for p in files])
+    np.savez(out / f"{split}_labels.npz", **labels)
+
+    dt = time.perf_counter() - t0
+    size = sum((out / s["file"]).stat().st_size for s in shards)
+    print(
+        f"[INFO] {split}: {len(files) - bad} images, {len(labels['seg_cls'])} polygons "
+        f"-> {len(shards)} shards ({size / 2**20:.0f} MB) in {dt:.1f}s"
+    )
+    return {
+        "images": str(img_dir.resolve()),
+        "imgsz": imgsz,
+        "shard_size": shard_size,
+        "augment": augment,
+        "resize_rule": rule,
+        "shards": shards,
+        "items": items,
+    }
+
+
+def pack(data: Path, out: Path, imgsz: int, shard_size: int, workers: int) -> dict:
+    out.mkdir(parents=True, exist_ok=True)
+    index_path = out / "index.json"
+    old = {}
+    if index_path.exists():
+        old = json.loads(index_path.read_text(encoding="utf-8"))
+        if old.get("version") != INDEX_VERSION:
+            old = {}
+
+    rule = _resize_rule()
+    if rule is None:
+        print("[WARN] cannot read ultralytics load_image source; assuming INTER_LINEAR resize")
+        rule = "linear"
+    index = {
+        "version": INDEX_VERSION,
+        "imgsz": imgsz,
+        "created": time.time(),
+        # 학습 때 설치된 ultralytics 와 비교 (보간법이 다르면 픽셀이 달라짐)
+        "ultralytics": _ultralytics_version(),
+        "resize_rule": rule,
+        "splits": {},
+    }
+    for split, img_dir in _split_dirs(data).items():
+        if not img_dir.is_dir():
+            print(f"[WARN] {split}: no such folder {img_dir}")
+            continue
+        index["splits"][split] = pack_split(
+            split, img_dir, out, imgsz, shard_size, workers, rule,
+            old=old.get("splits", {}).get(split),
+        )
+
+    # index 는 마지막에 교체 → 로더는 항상 완성된 샤드만 봄
+    tmp = index_path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(index, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, index_path)
+    return index
+
+
+# ---------- 로더 ----------
+class MmapDataset:
+    """
+    샤드를 mmap 으로 열어서 이미지 1장 = 슬롯 슬라이스 복사 1번.
+    DataLoader 워커(fork/spawn) 마다 샤드를 따로 열도록 프로세스 id 로 구분
+    """
+
+    def __init__(self, root, split: str = "train"):
+        self.root = Path(root)
+        index = json.loads((self.root / "index.json").read_text(encoding="utf-8"))
+        if index.get("version") != INDEX_VERSION:
+            raise ValueError(f"unsupported cache version: {index.get('version')}")
+        sp = index["splits"][split]
+        self.split = split
+        self.imgsz = sp["imgsz"]
+        self.augment = sp["augment"]
+        self.shard_size = sp["shard_size"]
+        self.shard_info = sp["shards"]
+        self.items = sp["items"]
+        lab = np.load(self.root / f"{split}_labels.npz")
+        self._img_off = lab["img_off"]
+        self._seg_off = lab["seg_off"]
+        self._seg_cls = lab["seg_cls"]
+        self._points = lab["points"]
+        self._shards = {}
+        self._pid = None
+
+    def __getstate__(self):
+        # 워커로 넘길 때 열린 memmap 은 빼고 보냄 (워커에서 다시 염)
+        state = self.__dict__.copy()
+        state["_shards"] = {}
+        state["_pid"] = None
+        return state
+
+    def __len__(self):
+        return len(self.items)
+
+    def _shard(self, k: int) -> np.ndarray:
+        if self._pid != os.getpid():
+            self._shards = {}
+            self._pid = os.getpid()
+        m = self._shards.get(k)
+        if m is None:
+            info = self.shard_info[k]
+            m = np.memmap(
+                self.root / info["file"], dtype=np.uint8, mode="r",
+                shape=(info["count"], self.imgsz, self.imgsz, 3),
+            )
+            self._shards[k] = m
+        return m
+
+    def is_fresh(self, i: int) -> bool:
+        """패킹 후 원본 이미지가 바뀌지 않았고 정상적으로 디코딩된 항목인지"""
+        it = self.items[i]
+        if not it["h"]:
+            return False
+        try:
+            st = os.stat(it["file"])
+        except OSError:
+            return False
+        return st.st_size == it["size"] and st.st_mtime_ns == it["mtime_ns"]
+
+    def load_image(self, i: int):
+        """ultralytics load_image 와 같은 반환값: (BGR 이미지, (h0, w0), (h, w))"""
+        it = self.items[i]
+        h, w = it["h"], it["w"]
+        slot = self._shard(i // self.shard_size)[i % self.shard_size]
+        # 증강이 이미지를 제자리 수정하므로 읽기 전용 mmap 을 복사해서 반환
+        return slot[:h, :w].copy(), (it["h0"], it["w0"]), (h, w)
+
+    def labels(self, i: int):
+        """(cls (K,), [정규화 좌표 (n, 2)] * K)"""
+        a, b = self._img_off[i], self._img_off[i + 1]
+        segs = [
+            self._points[self._seg_off[s]:self._seg_off[s + 1]] for s in range(a, b)
+        ]
+        return self._seg_cls[a:b].astype(int), segs
+
+    def letterbox(self, i: int):
+        """imgsz x imgsz 정사각형 (가운데 정렬, 패딩 114) + 폴리곤 픽셀 좌표"""
+        im, _, (h, w) = self.load_image(i)
+        s = self.imgsz
+        top, left = (s - h) // 2, (s - w) // 2
+        out = np.full((s, s, 3), PAD_VALUE, dtype=np.uint8)
+        out[top:top + h, left:left + w] = im
+        cls, segs = self.labels(i)
+        scale = np.array([w, h], dtype=np.float32)
+        offset = np.array([left, top], dtype=np.float32)
+        return out, cls, [seg * scale + offset for seg in segs]
+
+    def __getitem__(self, i: int) -> dict:
+        img, cls, segs = self.letterbox(i)
+        it = self.items[i]
+        return {
+            "im_file": it["file"],
+            "img": img,
+            "cls": cls,
+            "segments": segs,
+            "ori_shape": (it["h0"], it["w0"]),
+            "resized_shape": (it["h"], it["w"]),
+        }
+
+
+def use_mmap_cache(root="dataset_cache"):
+    """
+    ultralytics BaseDataset.load_image 를 캐시 읽기로 교체 (클래스 단위 → 워커 프로세스에도 적용).
+    캐시에 없는 이미지, imgsz/보간 설정이 다른 경우, 패킹 후 바뀐 이미지는 원래 방식으로 읽음.
+    설치된 ultralytics 의 보간 규칙이 패킹 때와 다르면 교체하지 않음 (다시 패킹 필요) → False 반환
+    """
+    from ultralytics.data.base import BaseDataset
+
+    index = json.loads((Path(root) / "index.json").read_text(encoding="utf-8"))
+    if index.get("version") != INDEX_VERSION:
+        print(f"[WARN] mmap dataset cache {root}: old format, re-run pack_dataset.py")
+        return False
+    rule = _resize_rule()
+    if rule is not None:
+        mismatch = rule != index.get("resize_rule")
+    else:  # 소스를 읽을 수 없음 → 같은 버전일 때만 사용
+        mismatch = _ultralytics_version() != index.get("ultralytics")
+    if mismatch:
+        print(
+            f"[WARN] mmap dataset cache {root} was packed for ultralytics "
+            f"{index.get('ultralytics')} (resize {index.get('resize_rule')}), installed "
+            f"{_ultralytics_version()} (resize {rule}) -> not used, re-run pack_dataset.py"
+        )
+        return False
+    lookup = {}
+    for split in index["splits"]:
+        ds = MmapDataset(root, split)
+        for i, it in enumerate(ds.items):
+            lookup[_norm(it["file"])] = (ds, i)
+
+    orig = getattr(BaseDataset.load_image, "_orig", BaseDataset.load_image)
+
+    def load_image(self, i, rect_mode=True):
+        hit = None
+        if rect_mode and self.ims[i] is None:
+            hit = lookup.get(_norm(self.im_files[i]))
+        if hit is None:
+            return orig(self, i, rect_mode)
+        ds, j = hit
+        if ds.imgsz != self.imgsz or ds.augment != self.augment or not ds.is_fresh(j):
+            return orig(self, i, rect_mode)
+
+        im, hw0, hw = ds.load_image(j)
+        if self.augment:
+            # mosaic 은 buffer 에 있는 이미지 중에서 고르므로 원래 load_image 와 똑같이 관리
+            self.ims[i], self.im_hw0[i], self.im_hw[i] = im, hw0, hw
+            self.buffer.append(i)
+            if 1 < len(self.buffer) >= self.max_buffer_length:
+                k = self.buffer.pop(0)
+                if self.cache != "ram":
+                    self.ims[k], self.im_hw0[k], self.im_hw[k] = None, None, None
+        return im, hw0, hw
+
+    load_image._orig = orig
+    BaseDataset.load_image = load_image
+    print(f"[INFO] mmap dataset cache: {len(lookup)} images from {root}")
+    return True
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--data", default="data.yaml")
+    # runs_yolo11/burr_seg_v1/args.yaml 의 imgsz 와 맞춰야 캐시가 사용됨
+    ap.add_argument("--imgsz", type=int, default=640)
+    ap.add_argument("--out", default="dataset_cache")
+    ap.add_argument("--shard-size", type=int, default=256, help="샤드 1개당 이미지 수")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    args = ap.parse_args()
+    pack(Path(args.data).resolve(), Path(args.out), args.imgsz, args.shard_size, args.workers)
+
+
+if __name__ == "__main__":
+    main()
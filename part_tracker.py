@@ -0,0 +1,193 @@
+"""
+프리런 모드용 부품(브레이크 디스크) 단위 추적 / 판정 집계
+- 같은 디스크가 여러 프레임에 연속으로 찍히므로, 프레임별 결과를 디스크 1개당 OK/NG 1건으로 묶음
+- 부품 구간: 움직임이 시작되면 새 부품, 움직임 없는 프레임(idle)이 gap_frames 연속이면 부품 종료
+- 결함 트랙: 클래스별로 중심점 거리 기준 그리디 매칭 → 여러 프레임에 걸쳐 같은 결함을 연결
+- NG 가 확정되면(needs_inference() == False) 해당 부품이 빠져나갈 때까지 추론 생략
+  OK 는 기본적으로 부품이 다 지나간 뒤(부품 종료 시)에만 확정
+
+제약:
+    - 컨베이어가 디스크를 카메라 아래에 세운 채 멈추면 idle 로 보고 부품을 종료함
+      (다시 움직이면 새 부품으로 취급)
+    - 디스크 사이 간격 없이 연속으로 들어오면 한 부품으로 합쳐짐 → 이 경우 트리거 모드 사용 권장
+"""
+
+import time
+from typing import Optional
+
+import numpy as np
+
+
+class _DefectTrack:
+    __slots__ = ("cls_id", "cx", "cy", "hits", "missed", "best_score")
+
+    def __init__(self, cls_id: int, cx: float, cy: float, score: float):
+        self.cls_id = cls_id
+        self.cx = cx
+        self.cy = cy
+        self.hits = 1
+        self.missed = 0
+        self.best_score = score
+
+
+class PartTracker:
+    """
+    gap_frames     : 연속 idle 프레임이 이 값 이상이면 현재 부품 종료
+    match_dist     : 프레임 간 같은 결함으로 볼 최대 중심점 이동 거리 (ROI 픽셀)
+    max_missed     : 트랙이 이 프레임 수만큼 연속 미검출이면 제거
+    ng_min_hits    : 같은 결함이 이 횟수 이상 검출되면 NG 확정
+    ok_min_frames  : 결함 없이 추론한 프레임이 이 값 이상이면 OK 조기 확정.
+                     0(기본)이면 부품 종료 시까지 계속 추론 — 움직이는 컨베이어에서는 디스크가
+                     ROI 에 다 들어오기 전에 clean 프레임이 쌓일 수 있으므로 0 유지
+    min_part_frames: 이보다 짧은 부품 구간은 노이즈로 보고 판정하지 않음
+    """
+
+    def __init__(
+        self,
+        class_names: dict,
+        gap_frames: int = 5,
+        match_dist: float = 80.0,
+        max_missed: int = 3,
+        ng_min_hits: int = 3,
+        ok_min_frames: int = 0,
+        min_part_frames: int = 3,
+    ):
+        self.class_names = class_names
+        self.gap_frames = gap_frames
+        self.match_dist = match_dist
+        self.max_missed = max_missed
+        self.ng_min_hits = ng_min_hits
+        self.ok_min_frames = ok_min_frames
+        self.min_part_frames = min_part_frames
+
+        self.part_id = 0
+        self.verdict: Optional[str] = None   # 현재 부품 판정 ("OK"/"NG"), 미확정이면 None
+        self._active = False
+        self._idle_run = 0
+        self._reset_part()
+
+    def _reset_part(self):
+        self._tracks: list[_DefectTrack] = []
+        self._confirmed: list[_DefectTrack] = []
+        self._frames = 0
+        self._inferred = 0
+        self._clean = 0
+        self._t_start = 0.0
+        self.verdict = None
+
+    # ---------- 스케줄링 ----------
+    def needs_inference(self) -> bool:
+        """판정이 확정된 부품(NG, 또는 ok_min_frames 로 조기 확정된 OK)은 더 이상 추론할 필요 없음"""
+        return self.verdict is None
+
+    # ---------- 프레임 단위 진행 ----------
+    def step(self, idle: bool) -> Optional[dict]:
+        """
+        매 프레임 호출 (추론 여부와 무관).
+        부품이 종료되면 판정 결과 dict 반환, 아니면 None.
+        """
+        if idle:
+            self._idle_run += 1
+        else:
+            self._idle_run = 0
+            if not self._active:
+                self._active = True
+                self.part_id += 1
+                self._reset_part()
+                self._t_start = time.time()
+
+        if not self._active:
+            return None
+
+        self._frames += 1
+        if self._idle_run < self.gap_frames:
+            return None
+
+        # 부품 종료 → 판정
+        self._active = False
+        if self._frames - self._idle_run < self.min_part_frames:
+            self._reset_part()
+            return None
+        return self._close()
+
+    def update(self, boxes: np.ndarray, cls_ids: np.ndarray, scores: np.ndarray):
+        """
+        추론한 프레임의 결함 검출 결과를 트랙에 반영.
+        boxes: (N, 4) xyxy, cls_ids: (N,), scores: (N,)
+        """
+        if not self._active or self.verdict is not None:
+            return
+        self._inferred += 1
+
+        n = len(boxes)
+        if n:
+            boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+            cls_ids = np.asarray(cls_ids).astype(int)
+            scores = np.asarray(scores, dtype=np.float32)
+            centers = np.stack(
+                [(boxes[:, 0] + boxes[:, 2]) * 0.5, (boxes[:, 1] + boxes[:, 3]) * 0.5],
+                axis=1,
+            )
+        matched_det = np.zeros(n, dtype=bool)
+        matched_trk = np.zeros(len(self._tracks), dtype=bool)
+
+        if n and self._tracks:
+            trk_xy = np.array([[t.cx, t.cy] for t in self._tracks], dtype=np.float32)
+            trk_cls = np.array([t.cls_id for t in self._tracks])
+            dist = np.linalg.norm(centers[:, None, :] - trk_xy[None, :, :], axis=2)
+            dist[cls_ids[:, None] != trk_cls[None, :]] = np.inf
+            dist[dist > self.match_dist] = np.inf
+
+            # 가까운 쌍부터 그리디 매칭
+            for flat in np.argsort(dist, axis=None):
+                di, ti = np.unravel_index(flat, dist.shape)
+                if not np.isfinite(dist[di, ti]):
+                    break
+                if matched_det[di] or matched_trk[ti]:
+                    continue
+                matched_det[di] = matched_trk[ti] = True
+                t = self._tracks[ti]
+                t.cx, t.cy = float(centers[di, 0]), float(centers[di, 1])
+                t.hits += 1
+                t.missed = 0
+                t.best_score = max(t.best_score, float(scores[di]))
+
+        for ti, t in enumerate(self._tracks):
+            if not matched_trk[ti]:
+                t.missed += 1
+        for di in np.flatnonzero(~matched_det):
+            self._tracks.append(
+                _DefectTrack(int(cls_ids[di]), float(centers[di, 0]),
+                             float(centers[di, 1]), float(scores[di]))
+            )
+
+        for t in self._tracks:
+            if t.hits >= self.ng_min_hits and t not in self._confirmed:
+                self._confirmed.append(t)
+        self._tracks = [t for t in self._tracks if t.missed <= self.max_missed]
+
+        self._clean = 0 if n else self._clean + 1
+
+        if self._confirmed:
+            self.verdict = "NG"
+        elif self.ok_min_frames > 0 and self._clean >= self.ok_min_frames:
+            self.verdict = "OK"
+
+    # ---------- 판정 ----------
+    def _close(self) -> dict:
+        defects: dict = {}
+        for t in self._confirmed:
+            label = self.class_names.get(t.cls_id, str(t.cls_id))
+            defects[label] = defects.get(label, 0) + 1
+
+        out = {
+            "part_id": self.part_id,
+            "verdict": "NG" if defects else "OK",
+            "defects": defects,
+            "frames": self._frames,
+            "inferred": self._inferred,
+            "t_start": self._t_start,
+            "t_end": time.time(),
+        }
+        self._reset_part()
+        return out
@@ -0,0 +1,44 @@
+"""
+카메라 원시 버퍼 → OpenCV BGR 이미지 변환
+- MVS SDK 없이도 쓸 수 있도록 HikrobotGigE.grab_frame_bgr 에서 분리
+  (벤치마크에서 녹화/합성 버퍼를 같은 경로로 변환하기 위함)
+- fmt: "Mono8" / "RGB8" / "BayerRG8"
+"""
+
+from typing import Optional
+
+import cv2
+import numpy as np
+
+PIXEL_FORMATS = ("Mono8", "RGB8", "BayerRG8")
+
+
+def buffer_to_bgr(buf, width: int, height: int, fmt: str) -> Optional[np.ndarray]:
+    # --- 1) Mono8 → Gray → BGR ---------------------------------
+    if fmt == "Mono8":
+        img_gray = np.frombuffer(buf, dtype=np.uint8,
+                                 count=width * height)
+        img_gray = img_gray.reshape(height, width)
+        img_bgr = cv2.cvtColor(img_gray, cv2.COLOR_GRAY2BGR)
+
+    # --- 2) RGB8 Packed → BGR -----------------------------------
+    elif fmt == "RGB8":
+        img_rgb = np.frombuffer(buf, dtype=np.uint8,
+                                count=width * height * 3)
+        img_rgb = img_rgb.reshape(height, width, 3)
+        img_bgr = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2BGR)
+
+    # --- 3) BayerRG8 → BGR (디모자이킹) --------------------------
+    elif fmt == "BayerRG8":
+        # 1채널 Bayer 패턴 이미지
+        img_bayer = np.frombuffer(buf, dtype=np.uint8,
+                                  count=width * height)
+        img_bayer = img_bayer.reshape(height, width)
+
+        # Bayer RG 패턴 → BGR 로 변환
+        img_bgr = cv2.cvtColor(img_bayer, cv2.COLOR_BAYER_RG2RGB)
+
+    else:
+        return None
+
+    return img_bgr
@@ -0,0 +1,158 @@
+"""
+검사 루프 → 웹 UI 실시간 미리보기 (MJPEG over HTTP)
+- 오버레이가 그려진 프레임을 한 번만 JPEG 인코딩하고, 접속한 모든 뷰어에게 같은 바이트를 전송
+- 미리보기 해상도(width) / 최대 fps 설정 가능, 뷰어가 없으면 인코딩도 생략
+- 뷰어마다 '가장 최신 프레임'만 가져가므로 느린 뷰어는 중간 프레임을 건너뜀
+  → publish() 는 절대 뷰어를 기다리지 않음 (추론 루프에 back-pressure 없음)
+
+엔드포인트:
+    GET /stream.mjpg   multipart/x-mixed-replace 스트림 (<img src=...> 로 바로 표시 가능)
+    GET /snapshot.jpg  최신 프레임 1장
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+_BOUNDARY = "frame"
+
+
+class PreviewStream:
+    def __init__(
+        self,
+        host: str = "0.0.0.0",
+        port: int = 8090,
+        width: int = 640,
+        max_fps: float = 10.0,
+        quality: int = 70,
+    ):
+        self.host = host
+        self.port = port
+        self.width = width
+        self.max_fps = max_fps
+        self.quality = quality
+
+        self._cond = threading.Condition()
+        self._jpeg = None           # 최신 JPEG 바이트 (모든 뷰어 공유)
+        self._seq = 0               # 프레임 번호 (뷰어가 새 프레임인지 판단)
+        self._last_pub = 0.0
+        self._viewers = 0
+        self._running = False
+        self._server = None
+        self._thread = None
+
+    # ---------- 서버 ----------
+    def start(self):
+        stream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, fmt, *args):  # 접속 로그로 콘솔이 도배되지 않게
+                pass
+
+            def _headers(self, ctype: str):
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Cache-Control", "no-cache, no-store")
+                self.send_header("Access-Control-Allow-Origin", "*")
+                self.end_headers()
+
+            def do_GET(self):
+                path = self.path.split("?")[0]
+                if path == "/snapshot.jpg":
+                    # 뷰어가 없으면 인코딩을 안 하므로, 잠시 뷰어로 등록하고 다음 프레임을 받음
+                    with stream._cond:
+                        stream._viewers += 1
+                        seq = stream._seq
+                    try:
+                        jpeg, _ = stream._latest(seq, timeout=2.0)
+                    finally:
+                        with stream._cond:
+                            stream._viewers -= 1
+                    if jpeg is None:
+                        self.send_error(503, "no frame yet")
+                        return
+                    self._headers("image/jpeg")
+                    self.wfile.write(jpeg)
+                    return
+                if path != "/stream.mjpg":
+                    self.send_error(404)
+                    return
+
+                self._headers(f"multipart/x-mixed-replace; boundary={_BOUNDARY}")
+                with stream._cond:
+                    stream._viewers += 1
+                seq = -1
+                try:
+                    while stream._running:
+                        jpeg, seq = stream._latest(seq, timeout=5.0)
+                        if jpeg is None:
+                            continue
+                        self.wfile.write(
+                            f"--{_BOUNDARY}\r\n"
+                            f"Content-Type: image/jpeg\r\n"
+                            f"Content-Length: {len(jpeg)}\r\n\r\n".encode("ascii")
+                        )
+                        self.wfile.write(jpeg)
+                        self.wfile.write(b"\r\n")
+                except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError):
+                    pass  # 브라우저 탭 닫힘
+                finally:
+                    with stream._cond:
+                        stream._viewers -= 1
+
+        self._running = True
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="preview-stream", daemon=True
+        )
+        self._thread.start()
+        print(f"[INFO] Preview stream: http://{self.host}:{self.port}/stream.mjpg")
+        return self
+
+    def stop(self):
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    # ---------- 프레임 공유 ----------
+    def _latest(self, last_seq: int, timeout: float):
+        """last_seq 이후의 새 프레임이 올 때까지 대기 → (jpeg, seq)"""
+        with self._cond:
+            if self._seq == last_seq or self._jpeg is None:
+                self._cond.wait(timeout)
+            if self._seq == last_seq:
+                return None, last_seq
+            return self._jpeg, self._seq
+
+    def publish(self, frame: np.ndarray):
+        """
+        추론 루프에서 매 프레임 호출. fps 상한 / 뷰어 없음이면 즉시 반환.
+        """
+        if not self._running or self._viewers == 0:
+            return
+        now = time.monotonic()
+        if self.max_fps > 0 and now - self._last_pub < 1.0 / self.max_fps:
+            return
+        self._last_pub = now
+
+        h, w = frame.shape[:2]
+        if self.width and w > self.width:
+            frame = cv2.resize(
+                frame, (self.width, int(h * self.width / w)), interpolation=cv2.INTER_AREA
+            )
+        ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            return
+
+        with self._cond:
+            self._jpeg = buf.tobytes()
+            self._seq += 1
+            self._cond.notify_all()